@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Compression benchmark for `/esession/fetch` responses.
+
+Builds a throwaway database holding email threads that look like real ones
+(replies quoting the earlier thread, signatures, PDF attachment text), then
+fetches them and reports, per available encoding, the compressed size, the
+time to compress and decompress, and the estimated time to deliver the
+response over links of different speeds compared with sending it as is.
+
+    python compression_benchmark.py --threads 3 --messages 40 --runs 10
+"""
+
+import argparse
+import gzip
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BANDWIDTHS_MBIT = [10, 100, 1000]
+
+SENTENCES = [
+    "Thanks for sending over the revised proposal.",
+    "I have gone through the pricing section and left a few comments.",
+    "Could we move the review meeting to Thursday afternoon?",
+    "The legal team still needs to sign off on the liability clause.",
+    "Please find the updated statement of work attached.",
+    "We agreed to ship the first milestone by the end of the quarter.",
+    "Let me know if the delivery schedule works for your side.",
+    "I will loop in our finance contact for the invoicing details.",
+]
+ATTACHMENT_LINES = [
+    "Section {n}. Scope of Services",
+    "The Supplier shall provide the services described in Schedule {n} in accordance with the agreed service levels.",
+    "Invoices are payable within thirty (30) days of receipt. Late payments accrue interest at 1.5% per month.",
+    "Item {n}    Qty {q}    Unit price ${p}.00    Total ${t}.00",
+]
+
+
+def median_ms(func, runs: int) -> float:
+    """Median wall time of `func()` in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def decompressors():
+    """Decompress function per encoding, for the encodings available here."""
+    result = {"gzip": gzip.decompress}
+    try:
+        import brotli
+        result["br"] = brotli.decompress
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        result["zstd"] = zstandard.ZstdDecompressor().decompress
+    except ImportError:
+        pass
+    return result
+
+
+def email_body(rng: random.Random, previous: str, sender: str) -> str:
+    """A reply with a few new sentences, a signature and the quoted earlier thread."""
+    new_text = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 6)))
+    body = f"Hi,\n\n{new_text}\n\nBest regards,\n{sender}\n-- \n{sender} | Account Manager | +1 555 0100"
+    if previous:
+        quoted = "\n".join(f"> {line}" for line in previous.splitlines())
+        body += f"\n\nOn Mon, Mar 3, 2025 at 10:00 AM {sender} <{sender.lower()}@example.com> wrote:\n{quoted}"
+    return body
+
+
+def attachment_text(rng: random.Random, pages: int) -> str:
+    """Text of a contract-like PDF of `pages` pages."""
+    lines = []
+    for n in range(1, pages * 12):
+        q, p = rng.randint(1, 20), rng.randint(10, 500)
+        lines.append(rng.choice(ATTACHMENT_LINES).format(n=n, q=q, p=p, t=q * p))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compression benchmark for session fetches")
+    parser.add_argument("--threads", type=int, default=3, help="Email threads (sessions) to fetch")
+    parser.add_argument("--messages", type=int, default=40, help="Messages per thread")
+    parser.add_argument("--attachment_every", type=int, default=8, help="Attach a PDF to every n-th message, 0 for none")
+    parser.add_argument("--attachment_pages", type=int, default=5, help="Pages per attachment")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per measurement")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="compression_benchmark_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ["ATTACHMENT_INDEX_DIR"] = os.path.join(workdir, "attachment_index")
+    os.environ["THREAD_SUMMARIES"] = "false"
+    sys.path.insert(0, ROOT)
+
+    from fastapi.testclient import TestClient
+
+    from email_assistant.backend.main import app
+    from email_assistant.backend.api.compression import COMPRESSION_MIN_SIZE, available_compressors
+    from email_assistant.backend.database.config import SessionLocal, unit_of_work
+    from email_assistant.backend.database.init_db import init_db
+    from email_assistant.backend.database.repositories import (
+        PersonRepository, SessionRepository, MessageRepository, AttachmentTextRepository,
+    )
+
+    rng = random.Random(42)
+    init_db()
+    db = SessionLocal()
+    session_ids = []
+    with unit_of_work(db):
+        alice = PersonRepository(db).create("Alice", "alice@example.com")
+        bob = PersonRepository(db).create("Bob", "bob@example.com")
+        message_repo = MessageRepository(db)
+        attachment_repo = AttachmentTextRepository(db)
+        for t in range(args.threads):
+            session = SessionRepository(db).create(str(alice.id), str(bob.id), f"Contract renewal {t}")
+            session_ids.append(str(session.session_id))
+            previous = ""
+            for i in range(args.messages):
+                sender, receiver = (alice, bob) if i % 2 == 0 else (bob, alice)
+                previous = email_body(rng, previous, sender.full_name)
+                message = message_repo.create(session_ids[-1], str(sender.id), str(receiver.id), previous, None)
+                if args.attachment_every and i % args.attachment_every == args.attachment_every - 1:
+                    message.message_file = f"contract_{t}_{i}.pdf"
+                    message.file_text_hash = attachment_repo.store(attachment_text(rng, args.attachment_pages))
+    db.close()
+
+    compressors = available_compressors()
+    decoders = decompressors()
+    print(f"Encodings available: {', '.join(compressors)} (threshold {COMPRESSION_MIN_SIZE} bytes)")
+    print(f"{args.threads} threads of {args.messages} messages, a {args.attachment_pages} page attachment every {args.attachment_every} messages")
+
+    with TestClient(app) as client:
+        bodies = []
+        for session_id in session_ids:
+            response = client.post(
+                "/esession/fetch",
+                json={"session_id": session_id, "include_content": True},
+                headers={"Accept-Encoding": "identity"},
+            )
+            assert response.status_code == 200 and "content-encoding" not in response.headers
+            bodies.append(response.content)
+
+        # The middleware must compress for clients that accept it, and the result must decode to the same body
+        compressed = client.post(
+            "/esession/fetch",
+            json={"session_id": session_ids[0], "include_content": True},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        assert compressed.headers.get("content-encoding") == "gzip"
+        assert compressed.content == bodies[0]
+
+        print()
+        header = f"{'encoding':<10}{'bytes':>12}{'ratio':>8}{'compress':>11}{'decompress':>12}"
+        header += "".join(f"{f'@{mbit} Mbit/s':>14}" for mbit in BANDWIDTHS_MBIT)
+        print(header)
+        total = sum(len(body) for body in bodies)
+
+        def row(name, size, compress_ms, decompress_ms):
+            line = f"{name:<10}{size:>12,}{total / size:>7.1f}x{compress_ms:>9.2f}ms{decompress_ms:>10.2f}ms"
+            for mbit in BANDWIDTHS_MBIT:
+                transfer_ms = size * 8 / (mbit * 1_000_000) * 1000
+                line += f"{compress_ms + transfer_ms + decompress_ms:>12.2f}ms"
+            print(line)
+
+        row("identity", total, 0.0, 0.0)
+        for name, compress in compressors.items():
+            encoded = [compress(body) for body in bodies]
+            assert all(decoders[name](e) == b for e, b in zip(encoded, bodies))
+            compress_ms = median_ms(lambda: [compress(body) for body in bodies], args.runs)
+            decompress_ms = median_ms(lambda: [decoders[name](e) for e in encoded], args.runs)
+            row(name, sum(len(e) for e in encoded), compress_ms, decompress_ms)
+
+    print("\nThe @ columns estimate compress + transfer + decompress time for all threads at that link speed.")
+
+
+if __name__ == "__main__":
+    main()
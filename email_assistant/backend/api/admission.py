@@ -0,0 +1,85 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Any
+
+# Limits of the LLM backed endpoints, per worker process
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "30"))
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is turned away because the LLM endpoints are saturated."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Admission control in front of the LLM backed endpoints.
+
+    At most `max_in_flight` requests run at once and at most `max_queue` more wait
+    for a slot, each for up to `queue_timeout` seconds. Anything beyond that is
+    rejected at once with an estimate of when to retry, so a burst degrades into
+    fast rejections instead of piling up until every request times out.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.counts = {"admitted": 0, "rejected": 0, "timed_out": 0}
+        # Moving average of the time a request holds its slot, for Retry-After
+        self.avg_seconds = 1.0
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained."""
+        waves = (self.queued + self.in_flight) / max(self.max_in_flight, 1)
+        return max(1, math.ceil(self.avg_seconds * waves))
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one in-flight slot for the duration of the block, waiting in the queue if needed."""
+        # `queued` counts a request from the moment it arrives, so a burst cannot slip past the check
+        if self.in_flight + self.queued >= self.max_in_flight + self.max_queue:
+            self.counts["rejected"] += 1
+            raise AdmissionRejected(f"Server is busy: {self.queued} requests queued", self.retry_after())
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.counts["timed_out"] += 1
+            raise AdmissionRejected(f"Timed out after {self.queue_timeout:.0f}s in the queue", self.retry_after())
+        finally:
+            self.queued -= 1
+
+        self.in_flight += 1
+        self.counts["admitted"] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * (time.perf_counter() - start)
+            self.in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load and totals, reported by the /metrics endpoint."""
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "avg_seconds": round(self.avg_seconds, 3),
+            **self.counts,
+        }
+
+
+llm_admission = AdmissionController(LLM_MAX_IN_FLIGHT, LLM_MAX_QUEUE, LLM_QUEUE_TIMEOUT_SECONDS)
@@ -1,37 +1,67 @@
 from fastapi import APIRouter, HTTPException, Depends
+from starlette.concurrency import run_in_threadpool
 
 from ..models.aisession_models import (
     AISessionCreateRequest,
     AISessionCreateResponse,
     AISessionChatRequest,
     AISessionChatResponse,
+    AISessionStatusRequest,
+    AISessionStatusResponse,
 )
-from ..services.aisession_service import SessionService 
+from ..services.aisession_service import SessionService, AISessionNotReady, AISessionNotFound
+from ..services.aisession_jobs import CallbackNotAllowed
+from .admission import llm_admission, AdmissionRejected
 
 router = APIRouter(prefix="/aisession", tags=["aisessions"])
 
 @router.post("/create", response_model=AISessionCreateResponse) 
 async def session_create(request: AISessionCreateRequest, session_service: SessionService = Depends()):
-    """Create a new AI session and return session ID."""
+    """Create a new AI session and return its ID at once. The session is set up in the background."""
     try:
-        session_id = await session_service.create_session(request.esession_id)
+        session_id = await session_service.create_session(request.esession_id, request.callback_url)
         return AISessionCreateResponse(
             success=True,
             aisession_id=session_id,
-            message="AI Session created successfully"
+            status="pending",
+            message="AI Session is being created"
         )
+    except CallbackNotAllowed as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create AI session: {str(e)}")
+
+
+@router.post("/status", response_model=AISessionStatusResponse)
+async def session_status(request: AISessionStatusRequest, session_service: SessionService = Depends()):
+    """Return the setup status of an AI session."""
+    try:
+        status = session_service.get_status(request.aisession_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get AI session status: {str(e)}")
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"AI session {request.aisession_id} not found")
+    return AISessionStatusResponse(**status)
     
 
 @router.post("/chat_with_sox", response_model=AISessionChatResponse) 
 async def session_chat(request: AISessionChatRequest, session_service: SessionService = Depends()):
     """Create a new AI session and return session ID."""
     try:
-        response = session_service.chat_with_sox(request.aisession_id, request.message, request.context)
+        async with llm_admission.slot():
+            # The model calls block, so they run in a worker thread and leave the event loop free
+            response = await run_in_threadpool(session_service.chat_with_sox, request.aisession_id, request.message, request.context)
         return AISessionChatResponse(
             aisession_id=request.aisession_id,
             response=str(response)
         )
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except AISessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except AISessionNotReady as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to chat in AI session: {str(e)}")
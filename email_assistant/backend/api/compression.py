@@ -0,0 +1,110 @@
+import gzip
+import os
+from typing import Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Responses smaller than this are sent as they are; compressing them costs more than it saves
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Server preference among the encodings a client accepts equally
+COMPRESSION_ENCODINGS = [e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()]
+
+
+def available_compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    """Return a compress function per encoding this process supports. brotli and zstandard are optional."""
+    compressors: Dict[str, Callable[[bytes], bytes]] = {
+        "gzip": lambda data: gzip.compress(data, compresslevel=5),
+    }
+    try:
+        import brotli
+        compressors["br"] = lambda data: brotli.compress(data, quality=4)
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        zstd_compressor = zstandard.ZstdCompressor(level=3)
+        compressors["zstd"] = zstd_compressor.compress
+    except ImportError:
+        pass
+    return compressors
+
+
+def negotiate_encoding(accept_encoding: str, preference: List[str]) -> Optional[str]:
+    """Pick the encoding with the highest q-value in an Accept-Encoding header, ties broken by `preference`."""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in preference:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts (zstd, br or gzip).
+
+    Responses below `minimum_size`, already encoded or streamed in several
+    chunks are passed through unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE, encodings: Optional[List[str]] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressors = available_compressors()
+        self.preference = [e for e in (encodings or COMPRESSION_ENCODINGS) if e in self.compressors]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.preference)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if message.get("more_body", False) or "content-encoding" in headers or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            body = self.compressors[encoding](body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            start_message["headers"] = headers.raw
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
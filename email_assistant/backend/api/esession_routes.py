@@ -10,11 +10,24 @@ from ..models.esession_models import (
     ESessionChatRequest,
     ESessionChatResponse,
     ESessionFetchRequest,
-    ESessionFetchResponse
+    ESessionFetchResponse,
+    ESessionDraftRequest,
+    ESessionDraftResponse,
+    ESessionDraftsRequest,
+    ESessionDraftsResponse,
+    ESessionSearchRequest,
+    ESessionSearchResponse,
+    ESessionListRequest,
+    ESessionListResponse
 )
 from ..services.esession_service import SessionService
+from .responses import FastJSONResponse
 
-router = APIRouter(prefix="/esession", tags=["esessions"])
+router = APIRouter(prefix="/esession", tags=["esessions"], default_response_class=FastJSONResponse)
+
+# Fetch, drafts, search and list can return thousands of rows the service layer has
+# already serialized. They build FastJSONResponse themselves, which skips revalidating
+# every row against the response model. The models still document the responses.
 
 
 @router.post("/create", response_model=ESessionCreateResponse)
@@ -98,18 +111,84 @@ async def session_chat(request: ESessionChatRequest, session_service: SessionSer
 async def session_fetch(request: ESessionFetchRequest, session_service: SessionService = Depends()):
     """Fetch all the messages of a session."""
     try:
-        response = session_service.fetch_session(request.session_id)
+        response = session_service.fetch_session(request.session_id, request.include_content)
         if response:
-            return ESessionFetchResponse(
-                success=True,
-                response=response,
-                message="Session detail fetched successfully!"
-            )
+            return FastJSONResponse({
+                "success": True,
+                "response": response,
+                "message": "Session detail fetched successfully!",
+            })
         else:
-            return ESessionFetchResponse(
-                success=False,
-                response=response,
-                message="Session detail fetching failed!"
-            )
+            return FastJSONResponse({
+                "success": False,
+                "response": response,
+                "message": "Session detail fetching failed!",
+            })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch session detail: {str(e)}") 
+
+
+@router.post("/draft", response_model=ESessionDraftResponse)
+async def session_draft(request: ESessionDraftRequest, session_service: SessionService = Depends()):
+    """Save a draft reply in a session."""
+    try:
+        draft_id = await session_service.save_draft(request.session_id, request.sender_id, request.message_text)
+        return ESessionDraftResponse(
+            success=True,
+            draft_id=draft_id,
+            message="Draft saved successfully"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save draft: {str(e)}")
+
+
+@router.post("/drafts", response_model=ESessionDraftsResponse)
+async def session_drafts(request: ESessionDraftsRequest, session_service: SessionService = Depends()):
+    """Fetch the draft replies of a session."""
+    try:
+        drafts = await session_service.fetch_drafts(request.session_id)
+        if drafts is None:
+            raise HTTPException(status_code=404, detail=f"Session {request.session_id} not found")
+        return FastJSONResponse({
+            "success": True,
+            "drafts": drafts,
+            "message": f"Fetched {len(drafts)} drafts",
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch drafts: {str(e)}")
+
+
+@router.post("/search", response_model=ESessionSearchResponse)
+async def session_search(request: ESessionSearchRequest, session_service: SessionService = Depends()):
+    """Search sessions by message and attachment text."""
+    try:
+        response = session_service.search(request.query, request.limit, request.offset)
+        return FastJSONResponse({
+            "success": True,
+            "sessions": response["sessions"],
+            "messages": response["messages"],
+            "message": f"Found {len(response['messages'])} matching messages",
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to search sessions: {str(e)}")
+
+
+@router.post("/list", response_model=ESessionListResponse)
+async def session_list(request: ESessionListRequest, session_service: SessionService = Depends()):
+    """List sessions by last activity with keyset pagination."""
+    try:
+        response = session_service.list_sessions(request.limit, request.cursor, request.participant_id)
+        return FastJSONResponse({
+            "success": True,
+            "sessions": response["sessions"],
+            "next_cursor": response["next_cursor"],
+            "message": f"Listed {len(response['sessions'])} sessions",
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch session detail: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to list sessions: {str(e)}")
\ No newline at end of file
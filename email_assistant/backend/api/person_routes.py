@@ -9,8 +9,9 @@ from ..models.person_models import (
     PersonSeekByIDResponse,
 )
 from ..services.person_service import PersonService
+from .responses import FastJSONResponse
 
-router = APIRouter(prefix="/person", tags=["persons"]) 
+router = APIRouter(prefix="/person", tags=["persons"], default_response_class=FastJSONResponse) 
 
 
 @router.post("/create", response_model=PersonCreateResponse)
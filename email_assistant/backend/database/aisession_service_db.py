@@ -1,20 +1,22 @@
-from typing import Optional
+from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
 
-from .config import get_db
+from .config import SessionLocal, unit_of_work
 from .repositories import AISessionRepository
 
 
 class AISessionService:
     """Database-backed session service that integrates with the core session manager."""
     
-    def __init__(self):
-        self.db: Optional[Session] = None
+    def __init__(self, db: Optional[Session] = None):
+        # Share the caller's (usually request-scoped) session, or own one opened on first use
+        self.db: Optional[Session] = db
+        self._owns_db = db is None
     
     def _get_db(self):
         """Get database session."""
         if self.db is None:
-            self.db = next(get_db())
+            self.db = SessionLocal()
         return self.db
     
     def get_session(self, session_id: str):
@@ -33,14 +35,39 @@ class AISessionService:
         """Create a new session in the database."""
         try:
             db = self._get_db()
-            aisession_repo = AISessionRepository(db)
-            session = aisession_repo.create(esession_id)
-            return str(session.session_id)
+            with unit_of_work(db):
+                aisession_repo = AISessionRepository(db)
+                session = aisession_repo.create(esession_id)
+                session_id = str(session.session_id)
+            return session_id
         except Exception as e:
             raise e
     
+    def get_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get the setup status of an AI session, or None if it does not exist."""
+        try:
+            db = self._get_db()
+            session = AISessionRepository(db).get_by_id(session_id)
+            if not session:
+                return None
+            return {"aisession_id": str(session.session_id), "status": session.status, "error": session.error}
+        except ValueError:
+            return None
+    
+    def set_status(self, session_id: str, status: str, error: Optional[str] = None) -> bool:
+        """Record the outcome of a pending AI session's setup. Returns False if it was no longer pending."""
+        db = self._get_db()
+        with unit_of_work(db):
+            return AISessionRepository(db).set_status(session_id, status, error)
+    
+    def fail_stale_pending(self, timeout_seconds: int, session_id: Optional[str] = None) -> int:
+        """Mark AI sessions whose setup has been pending too long, one or all, as failed."""
+        db = self._get_db()
+        with unit_of_work(db):
+            return AISessionRepository(db).fail_stale_pending(timeout_seconds, session_id)
+    
     def close(self):
-        """Close the database connection."""
-        if self.db:
+        """Close the database connection if this service opened it."""
+        if self.db and self._owns_db:
             self.db.close()
-            self.db = None 
\ No newline at end of file
+        self.db = None 
\ No newline at end of file
@@ -3,29 +3,64 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.inspection import inspect
-from sqlalchemy import event
+from sqlalchemy import event, DateTime
 from sqlalchemy.engine import Engine
+from operator import attrgetter
 import os
 import uuid 
+import zlib
+from contextlib import contextmanager
 from datetime import datetime 
 
+from .query_log import install_query_logging
+
 # Database URL - can be configured via environment variable
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./email_assistant.db")
 
+def compress_text(text: str) -> bytes:
+    """Compress attachment text for storage."""
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def decompress_text(data):
+    """Decompress attachment text stored with `compress_text`."""
+    if data is None:
+        return None
+    return zlib.decompress(data).decode("utf-8")
+
+
+# How long (in milliseconds) a connection waits for another process to release a SQLite write lock
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def is_memory_database(url: str) -> bool:
+    """Return True for in-memory SQLite URLs, which only exist inside one connection."""
+    return url.startswith("sqlite") and (url.rstrip("/").endswith(":") or ":memory:" in url or "mode=memory" in url)
+
+
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    # WAL lets readers in other workers proceed while one worker writes, and
+    # writers wait for the lock instead of failing with "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
     cursor.close()
 
-# Create SQLAlchemy engine
+# Create SQLAlchemy engine. File databases get a regular connection pool per
+# process; only an in-memory database needs the single shared StaticPool connection.
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {},
-    poolclass=StaticPool if "sqlite" in DATABASE_URL else None,
-    echo=True  # Set to False in production
+    poolclass=StaticPool if is_memory_database(DATABASE_URL) else None,
+    echo=os.getenv("SQL_ECHO", "false").lower() == "true"  # Full statement echo for debugging only
 )
 
+# Log slow and sampled statements instead of echoing every one
+install_query_logging(engine)
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -35,16 +70,42 @@ class BaseModel:
     __abstract__ = True
 
     def to_dict(self):
-        result = {}
-        for c in inspect(self).mapper.column_attrs: # type: ignore
-            value = getattr(self, c.key)
-            # Convert UUIDs and datetimes to string
-            if isinstance(value, uuid.UUID):
-                value = str(value)
-            elif isinstance(value, datetime):
-                value = value.isoformat()
-            result[c.key] = value
-        return result
+        cls = type(self)
+        # The serializer is compiled once per model class, on its first row
+        serializer = cls.__dict__.get("_row_serializer")
+        if serializer is None:
+            serializer = compile_row_serializer(cls)
+            setattr(cls, "_row_serializer", serializer)
+        return serializer(self)
+
+
+def compile_row_serializer(model):
+    """Build a function that turns a row of `model` into a JSON-ready dict of its columns.
+
+    The mapper is inspected once: the column values are read with one getter and
+    only the datetime columns are converted per row. IDs are stored as strings.
+    """
+    column_attrs = list(inspect(model).column_attrs)  # type: ignore
+    keys = tuple(c.key for c in column_attrs)
+    get_values = attrgetter(*keys) if len(keys) > 1 else (lambda row: (getattr(row, keys[0]),))
+    converted = tuple(i for i, c in enumerate(column_attrs) if isinstance(c.columns[0].type, DateTime))
+
+    def serialize(row):
+        values = list(get_values(row))
+        for i in converted:
+            values[i] = to_json_value(values[i])
+        return dict(zip(keys, values))
+
+    return serialize
+
+
+def to_json_value(value):
+    """Convert UUIDs and datetimes to string."""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    elif isinstance(value, datetime):
+        return value.isoformat()
+    return value
 
 # Create Base class for models
 Base = declarative_base(cls=BaseModel)
@@ -55,4 +116,25 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close() 
+
+
+@contextmanager
+def unit_of_work(db):
+    """Group repository operations into one transaction.
+
+    Commits once when the block exits, or rolls everything back if it raises.
+    Nested blocks join the outermost one.
+    """
+    if db.info.get("unit_of_work"):
+        yield db
+        return
+    db.info["unit_of_work"] = True
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.info["unit_of_work"] = False
@@ -1,30 +1,37 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
+import json
 import os 
 
-from .config import get_db
-from .repositories import SessionRepository, MessageRepository
+from .config import SessionLocal, to_json_value, unit_of_work
+from .repositories import SessionRepository, MessageRepository, AttachmentTextRepository, SessionSummaryRepository
+from ..engine.utils.attachment_index import attachment_index
+from ..engine.agents.thread_summarizer import schedule_summary_update
 
 
 class DatabaseSessionService:
     """Database-backed session service that integrates with the core session manager."""
     
-    def __init__(self):
-        self.db: Optional[Session] = None
+    def __init__(self, db: Optional[Session] = None):
+        # Share the caller's (usually request-scoped) session, or own one opened on first use
+        self.db: Optional[Session] = db
+        self._owns_db = db is None
     
     def _get_db(self):
         """Get database session."""
         if self.db is None:
-            self.db = next(get_db())
+            self.db = SessionLocal()
         return self.db
     
     def create_session(self, sender_id: str, receiver_id: str, subject: str) -> str:
         """Create a new session in the database."""
         try:
             db = self._get_db()
-            session_repo = SessionRepository(db)
-            session = session_repo.create(sender_id, receiver_id, subject)
-            return str(session.session_id)
+            with unit_of_work(db):
+                session_repo = SessionRepository(db)
+                session = session_repo.create(sender_id, receiver_id, subject)
+                session_id = str(session.session_id)
+            return session_id
         except Exception as e:
             raise e
     
@@ -32,8 +39,14 @@ class DatabaseSessionService:
         """Delete a session from the database."""
         try:
             db = self._get_db()
-            session_repo = SessionRepository(db)
-            return session_repo.delete(session_id)
+            with unit_of_work(db):
+                session_repo = SessionRepository(db)
+                deleted = session_repo.delete(session_id)
+                if deleted:
+                    AttachmentTextRepository(db).delete_unreferenced()
+            if deleted:
+                attachment_index.drop(session_id)
+            return deleted
         except ValueError:
             return False
     
@@ -41,8 +54,15 @@ class DatabaseSessionService:
         """Edit a message in the database."""
         try:
             db = self._get_db()
-            message_repo = MessageRepository(db)
-            return message_repo.update_text(message_id, content) is not None
+            with unit_of_work(db):
+                message_repo = MessageRepository(db)
+                updated = message_repo.update_text(message_id, content) is not None
+                if updated:
+                    # The summary may quote the old text, so it is rebuilt from the first message
+                    SessionSummaryRepository(db).reset(session_id)
+            if updated:
+                schedule_summary_update(session_id)
+            return updated
         except ValueError:
             return False
     
@@ -54,24 +74,70 @@ class DatabaseSessionService:
             if ( file_path ) and ( not os.path.exists(file_path) ):
                 raise Exception("File not found!")
 
-            message_repo = MessageRepository(db)
-            message = message_repo.create(
-                session_id=session_id,
-                sender_id=sender_id,
-                receiver_id=receiver_id,
-                message_text=message_text,
-                message_file=file_path
-            )
+            with unit_of_work(db):
+                message_repo = MessageRepository(db)
+                message = message_repo.create(
+                    session_id=session_id,
+                    sender_id=sender_id,
+                    receiver_id=receiver_id,
+                    message_text=message_text,
+                    message_file=file_path
+                )
+                message_id = str(message.message_id)
+                file_text = message.file_text
+            if file_text:
+                attachment_index.add(session_id, message_id, file_text)
+            schedule_summary_update(session_id)
 
-            return str(message.message_id)
+            return message_id
             
         except ValueError:
             return "Error: Invalid session ID"
         except Exception as e:
             return f"Error processing message: {str(e)}"
     
-    def get_session_info(self, session_id: str) -> Optional[Dict[str, Any]]:
-        """Get session information from the database."""
+    def save_draft(self, session_id: str, sender_id: str, message_text: str) -> str:
+        """Save a draft reply from one participant of a session to the other and return its ID."""
+        db = self._get_db()
+        with unit_of_work(db):
+            session = SessionRepository(db).get_by_id(session_id)
+            if not session:
+                raise ValueError(f"Session {session_id} not found")
+            participants = {str(session.sender_id), str(session.receiver_id)}
+            if str(sender_id) not in participants:
+                raise ValueError(f"Person {sender_id} is not a participant of session {session_id}")
+            receiver_id = (participants - {str(sender_id)} or participants).pop()
+            draft = MessageRepository(db).create_draft(session_id, sender_id, receiver_id, message_text)
+            draft_id = str(draft.message_id)
+        return draft_id
+    
+    def get_drafts(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the draft replies of a session, newest first, or None if the session does not exist."""
+        try:
+            db = self._get_db()
+            if not SessionRepository(db).exists(session_id):
+                return None
+            return [draft.to_dict() for draft in MessageRepository(db).get_drafts_by_session(session_id)]
+        except ValueError:
+            return None
+    
+    def get_thread_summary(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get the rolling summary and key facts of a session, or None if none was built yet."""
+        try:
+            db = self._get_db()
+            stored = SessionSummaryRepository(db).get(session_id)
+            if not stored:
+                return None
+            return {
+                "summary": stored.summary,
+                "key_facts": json.loads(stored.key_facts),
+                "message_count": stored.message_count,
+            }
+        except ValueError:
+            return None
+    
+    def get_session_info(self, session_id: str, include_content: bool = True) -> Optional[Dict[str, Any]]:
+        """Get session information from the database, with message and attachment text if `include_content` is set."""
         
         try:
             db = self._get_db()
@@ -86,10 +152,16 @@ class DatabaseSessionService:
 
             # Get messages for this session
             message_repo = MessageRepository(db)
-            messages = message_repo.get_by_session(session_id)
+            if include_content:
+                messages = message_repo.get_by_session(session_id)
+                session_messages = [msg.to_dict() for msg in messages] 
+            else:
+                session_messages = [
+                    {key: to_json_value(value) for key, value in msg.items()}
+                    for msg in message_repo.get_metadata_by_session(session_id)
+                ]
             
             # Add message details
-            session_messages = [msg.to_dict() for msg in messages] 
             session_info["messages"] = session_messages
 
             return session_info
@@ -100,8 +172,27 @@ class DatabaseSessionService:
             print(f"Error getting session info: {e}")
             return None
     
+    def list_sessions(self, limit: int, cursor: Optional[str], participant_id: Optional[str]) -> Dict[str, Any]:
+        """List sessions by last activity, one keyset page at a time."""
+        db = self._get_db()
+        session_repo = SessionRepository(db)
+        sessions, next_cursor = session_repo.list_by_activity(limit, cursor, participant_id)
+        return {
+            "sessions": [session.to_dict() for session in sessions],
+            "next_cursor": next_cursor,
+        }
+    
+    def search(self, query: str, limit: int, offset: int) -> Dict[str, Any]:
+        """Search message and attachment text, returning ranked sessions and messages."""
+        db = self._get_db()
+        message_repo = MessageRepository(db)
+        return {
+            "sessions": message_repo.search_sessions(query, limit, offset),
+            "messages": message_repo.search(query, limit, offset),
+        }
+    
     def close(self):
-        """Close the database connection."""
-        if self.db:
+        """Close the database connection if this service opened it."""
+        if self.db and self._owns_db:
             self.db.close()
-            self.db = None 
\ No newline at end of file
+        self.db = None 
\ No newline at end of file
@@ -1,6 +1,11 @@
+from sqlalchemy import text
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.orm import Session
 from .config import engine, SessionLocal
 from .models import Base, SQLitePerson as Person, SQLiteSession as DBSession, SQLiteMessage as Message, SQLiteAISession as AISession
+from .repositories import AttachmentTextRepository, body_values
+from ..engine.utils.attachment_index import attachment_index
+from ..engine.utils.token_counter import count_tokens
 import uuid
 
 
@@ -8,9 +13,290 @@ def init_db():
     """Initialize the database with tables."""
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    create_attachment_search_index()
+    migrate_attachment_texts()
+    migrate_session_stats()
+    migrate_token_counts()
+    migrate_normalized_text()
+    migrate_message_seq()
+    migrate_aisession_status()
+    migrate_summary_generation()
+    create_session_stats_triggers()
+    create_search_index()
+    build_attachment_index()
     print("Database tables created successfully!")
 
 
+# FTS5 indexes. `emessages_fts` is an external content table over the message
+# text, kept in sync by the triggers. Attachment text is stored compressed, so
+# it is indexed once per distinct text in `attachment_texts_fts`, which
+# `AttachmentTextRepository.store` fills; searches reach the messages of an
+# attachment through `file_text_hash`. Both are keyed on integer primary keys,
+# which VACUUM does not renumber.
+SEARCH_INDEX_TRIGGERS = ["emessages_fts_insert", "emessages_fts_delete", "emessages_fts_update"]
+
+SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS emessages_fts USING fts5(
+        message_text,
+        content='emessages',
+        content_rowid='message_seq',
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS emessages_fts_insert AFTER INSERT ON emessages BEGIN
+        INSERT INTO emessages_fts(rowid, message_text) VALUES (new.message_seq, new.message_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS emessages_fts_delete AFTER DELETE ON emessages BEGIN
+        INSERT INTO emessages_fts(emessages_fts, rowid, message_text) VALUES ('delete', old.message_seq, old.message_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS emessages_fts_update AFTER UPDATE OF message_text ON emessages BEGIN
+        INSERT INTO emessages_fts(emessages_fts, rowid, message_text) VALUES ('delete', old.message_seq, old.message_text);
+        INSERT INTO emessages_fts(rowid, message_text) VALUES (new.message_seq, new.message_text);
+    END
+    """,
+]
+
+ATTACHMENT_SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS attachment_texts_fts USING fts5(
+        file_text,
+        tokenize='porter unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS attachment_texts_fts_delete AFTER DELETE ON attachment_texts BEGIN
+        DELETE FROM attachment_texts_fts WHERE rowid = old.text_id;
+    END
+    """,
+]
+
+
+def migrate_attachment_texts():
+    """Move inline `emessages.file_text` from older databases into `attachment_texts`."""
+    with engine.begin() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(emessages)"))}
+        if "file_text_hash" not in columns:
+            conn.execute(text(
+                "ALTER TABLE emessages ADD COLUMN file_text_hash VARCHAR(64) REFERENCES attachment_texts(content_hash)"
+            ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_emessages_file_text_hash ON emessages (file_text_hash)"))
+        if "file_text" not in columns:
+            return
+
+    db = SessionLocal()
+    try:
+        attachment_repo = AttachmentTextRepository(db)
+        rows = db.execute(text("SELECT message_id, file_text FROM emessages WHERE file_text IS NOT NULL AND file_text != ''")).all()
+        for message_id, file_text in rows:
+            db.execute(
+                text("UPDATE emessages SET file_text_hash = :content_hash WHERE message_id = :message_id"),
+                {"content_hash": attachment_repo.store(file_text), "message_id": message_id}
+            )
+        db.execute(text("ALTER TABLE emessages DROP COLUMN file_text"))
+        db.commit()
+        print(f"Moved attachment text of {len(rows)} messages to attachment_texts")
+    finally:
+        db.close()
+
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+
+# Denormalized thread stats on `esessions`, so listing threads by last activity
+# is a range scan over `ix_esessions_activity` instead of an aggregate over messages.
+# Drafts are not part of the thread until they are sent, so they are not counted.
+LAST_MESSAGE_SQL = """
+    SELECT {column} FROM emessages WHERE session_id = {session_id} AND COALESCE(is_draft, 0) = 0
+    ORDER BY created_at DESC, rowid DESC LIMIT 1
+"""
+
+SESSION_STATS_TRIGGERS = ["emessages_stats_insert", "emessages_stats_update", "emessages_stats_delete"]
+
+SESSION_STATS_DDL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS emessages_stats_insert AFTER INSERT ON emessages
+    WHEN COALESCE(new.is_draft, 0) = 0 BEGIN
+        UPDATE esessions
+        SET message_count = message_count + 1,
+            last_message_at = CASE WHEN last_message_at IS NULL OR new.created_at >= last_message_at
+                                   THEN new.created_at ELSE last_message_at END,
+            last_message_preview = CASE WHEN last_message_at IS NULL OR new.created_at >= last_message_at
+                                        THEN substr(new.message_text, 1, 200) ELSE last_message_preview END
+        WHERE session_id = new.session_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS emessages_stats_update AFTER UPDATE OF message_text ON emessages BEGIN
+        UPDATE esessions
+        SET last_message_preview = substr(new.message_text, 1, 200)
+        WHERE session_id = new.session_id
+          AND new.message_id = ({LAST_MESSAGE_SQL.format(column="message_id", session_id="new.session_id")});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS emessages_stats_delete AFTER DELETE ON emessages
+    WHEN COALESCE(old.is_draft, 0) = 0 BEGIN
+        UPDATE esessions
+        SET message_count = message_count - 1,
+            last_message_at = COALESCE(({LAST_MESSAGE_SQL.format(column="created_at", session_id="old.session_id")}), created_at),
+            last_message_preview = ({LAST_MESSAGE_SQL.format(column="substr(message_text, 1, 200)", session_id="old.session_id")})
+        WHERE session_id = old.session_id;
+    END
+    """,
+]
+
+
+def migrate_session_stats():
+    """Add and backfill the thread stats columns on databases created before they existed."""
+    with engine.begin() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(esessions)"))}
+        if "message_count" in columns:
+            return
+        conn.execute(text("ALTER TABLE esessions ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0"))
+        conn.execute(text("ALTER TABLE esessions ADD COLUMN last_message_at DATETIME"))
+        conn.execute(text("ALTER TABLE esessions ADD COLUMN last_message_preview TEXT"))
+        conn.execute(text(f"""
+            UPDATE esessions
+            SET message_count = (SELECT COUNT(*) FROM emessages WHERE session_id = esessions.session_id AND COALESCE(is_draft, 0) = 0),
+                last_message_at = COALESCE(({LAST_MESSAGE_SQL.format(column="created_at", session_id="esessions.session_id")}), created_at),
+                last_message_preview = ({LAST_MESSAGE_SQL.format(column="substr(message_text, 1, 200)", session_id="esessions.session_id")})
+        """))
+    # create_all skips indexes of tables that already exist
+    for table in (DBSession.__table__, Message.__table__):
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def migrate_normalized_text():
+    """Add `emessages.normalized_text` to older databases and normalize the stored messages."""
+    with engine.begin() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(emessages)"))}
+        if "normalized_text" in columns:
+            return
+        conn.execute(text("ALTER TABLE emessages ADD COLUMN normalized_text TEXT"))
+        rows = conn.execute(text("SELECT message_id, message_text FROM emessages")).all()
+        if rows:
+            # Token counts now count the normalized text that prompts use
+            conn.execute(
+                text("UPDATE emessages SET normalized_text = :normalized_text, token_count = :token_count WHERE message_id = :message_id"),
+                [{**body_values(message_text), "message_id": message_id} for message_id, message_text in rows]
+            )
+            print(f"Normalized {len(rows)} messages")
+
+
+def migrate_message_seq():
+    """Rebuild `emessages` of older databases around the integer primary key `message_seq`.
+
+    Older tables are keyed on `message_id` only, so their rowid can change on
+    VACUUM. The rows keep their current rowid as `message_seq`.
+    """
+    with engine.begin() as conn:
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(emessages)"))]
+        if "message_seq" in columns:
+            return
+        table = Message.__table__
+        create_sql = str(CreateTable(table).compile(conn)).replace("CREATE TABLE emessages", "CREATE TABLE emessages_rebuild", 1)
+        copied = ", ".join(c.name for c in table.columns if c.name in columns)
+        conn.execute(text(create_sql))
+        conn.execute(text(
+            f"INSERT INTO emessages_rebuild (message_seq, {copied}) SELECT rowid, {copied} FROM emessages ORDER BY rowid"
+        ))
+        # Dropping the old table drops its indexes and triggers, which are created again below and in init_db
+        conn.execute(text("DROP TABLE emessages"))
+        conn.execute(text("ALTER TABLE emessages_rebuild RENAME TO emessages"))
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+        print("Added message_seq to emessages")
+
+
+def migrate_token_counts():
+    """Add `emessages.token_count` to older databases and count the messages that have none."""
+    with engine.begin() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(emessages)"))}
+        if "token_count" not in columns:
+            conn.execute(text("ALTER TABLE emessages ADD COLUMN token_count INTEGER"))
+        rows = conn.execute(text("SELECT message_id, message_text FROM emessages WHERE token_count IS NULL")).all()
+        if rows:
+            conn.execute(
+                text("UPDATE emessages SET token_count = :token_count WHERE message_id = :message_id"),
+                [{"token_count": count_tokens(message_text), "message_id": message_id} for message_id, message_text in rows]
+            )
+            print(f"Counted tokens of {len(rows)} messages")
+
+
+def migrate_aisession_status():
+    """Add the setup status columns to `aisessions` of older databases. Existing AI sessions are ready."""
+    with engine.begin() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(aisessions)"))}
+        if "status" not in columns:
+            conn.execute(text("ALTER TABLE aisessions ADD COLUMN status VARCHAR(16) NOT NULL DEFAULT 'ready'"))
+            conn.execute(text("ALTER TABLE aisessions ADD COLUMN error TEXT"))
+
+
+def migrate_summary_generation():
+    """Add `esessions.summary_generation` to older databases."""
+    with engine.begin() as conn:
+        columns = {row[1] for row in conn.execute(text("PRAGMA table_info(esessions)"))}
+        if "summary_generation" not in columns:
+            conn.execute(text("ALTER TABLE esessions ADD COLUMN summary_generation INTEGER NOT NULL DEFAULT 0"))
+
+
+def create_session_stats_triggers():
+    """Create the triggers that keep the thread stats in sync, replacing older versions."""
+    with engine.begin() as conn:
+        for name in SESSION_STATS_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for statement in SESSION_STATS_DDL:
+            conn.execute(text(statement))
+
+
+def create_attachment_search_index():
+    """Create the attachment text search index, which storing attachment text writes to."""
+    with engine.begin() as conn:
+        for statement in ATTACHMENT_SEARCH_INDEX_DDL:
+            conn.execute(text(statement))
+
+
+def create_search_index():
+    """Create the message text search index and backfill it for existing messages."""
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'emessages_fts'")
+        ).first()
+        for name in SEARCH_INDEX_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        for statement in SEARCH_INDEX_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text("INSERT INTO emessages_fts(emessages_fts) VALUES ('rebuild')"))
+
+
+def build_attachment_index():
+    """Build the attachment chunk index of the sessions that have attachment text but no index yet."""
+    db = SessionLocal()
+    try:
+        rows = db.query(Message.session_id).filter(Message.file_text_hash.isnot(None)).distinct().all()
+        missing = [str(session_id) for (session_id,) in rows if not attachment_index.exists(str(session_id))]
+        for session_id in missing:
+            messages = (
+                db.query(Message)
+                .filter(Message.session_id == session_id, Message.file_text_hash.isnot(None))
+                .order_by(Message.created_at)
+                .all()
+            )
+            attachment_index.add_many(session_id, [(str(m.message_id), m.file_text) for m in messages])
+        if missing:
+            print(f"Indexed the attachments of {len(missing)} sessions")
+    finally:
+        db.close()
+
+
 def create_sample_data():
     """Create sample data for testing."""
     db = SessionLocal()
@@ -35,7 +321,7 @@ def create_sample_data():
         
         db.add(person1)
         db.add(person2)
-        db.commit()
+        db.flush()
 
         print("Person added successfully...")
         
@@ -46,7 +332,7 @@ def create_sample_data():
             subject="Initial project discussion and requirements gathering"
         )
         db.add(session)
-        db.commit()
+        db.flush()
 
         print("Session added successfully...")
         
@@ -56,8 +342,7 @@ def create_sample_data():
             sender_id=str(person1.id),
             receiver_id=str(person2.id),
             message_text="Hi Jane, I'd like to discuss the new project requirements. Can we schedule a meeting?",
-            message_file=None,
-            file_text=None        
+            message_file=None
         )
         
         message2 = Message(
@@ -65,13 +350,12 @@ def create_sample_data():
             sender_id=str(person2.id),
             receiver_id=str(person1.id),
             message_text="Hi John, absolutely! I'm available tomorrow at 2 PM. Does that work for you?",
-            message_file=None,
-            file_text=None
+            message_file=None
         )
         
         db.add(message1)
         db.add(message2)
-        db.commit()
+        db.flush()
 
         print("Message added successfully...")
 
@@ -80,10 +364,12 @@ def create_sample_data():
         )
 
         db.add(ai_session)
-        db.commit()
+        db.flush()
 
         print("AI session added successfully...")
-        
+
+        # Everything above is written in a single transaction
+        db.commit()
         print("Sample data created successfully!")
         
     except Exception as e:
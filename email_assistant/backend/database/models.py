@@ -1,11 +1,11 @@
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Boolean, Integer, LargeBinary, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy.orm import relationship, declarative_base, deferred
 from sqlalchemy.sql import func
 from datetime import datetime
 import uuid
 
-from .config import Base
+from .config import Base, decompress_text
 
 #########################
 
@@ -149,6 +149,18 @@ class SQLiteSession(Base):
     receiver_id = Column(SQLiteUUID(), ForeignKey("persons.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Thread stats, maintained by triggers on emessages (see init_db.SESSION_STATS_DDL)
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_message_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_message_preview = Column(Text, nullable=True)
+    # Bumped when an edit resets the rolling summary, so builds started before it are discarded
+    summary_generation = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_esessions_activity", "last_message_at", "session_id"),
+        Index("ix_esessions_sender_activity", "sender_id", "last_message_at", "session_id"),
+        Index("ix_esessions_receiver_activity", "receiver_id", "last_message_at", "session_id"),
+    )
 
     # Relationships
     messages = relationship(
@@ -166,27 +178,91 @@ class SQLiteSession(Base):
         foreign_keys=[receiver_id],
         back_populates="sessions_received"
     )
+    thread_summary = relationship(
+        "SQLiteSessionSummary",
+        uselist=False,
+        cascade="all, delete-orphan"
+    )
 
 class SQLiteMessage(Base):
     """Message model for SQLite compatibility."""
     __tablename__ = "emessages"
     
-    message_id = Column(SQLiteUUID(), primary_key=True, default=lambda: str(uuid.uuid4()))
+    # Integer key of the search index and the thread summaries. As the rowid alias it keeps
+    # its value through VACUUM, and AUTOINCREMENT never hands out the key of a deleted message.
+    message_seq = Column(Integer, primary_key=True, autoincrement=True)
+    message_id = Column(SQLiteUUID(), nullable=False, unique=True, default=lambda: str(uuid.uuid4()))
     session_id = Column(SQLiteUUID(), ForeignKey("esessions.session_id"), nullable=False)
     sender_id = Column(SQLiteUUID(), ForeignKey("persons.id"), nullable=False)
     receiver_id = Column(SQLiteUUID(), ForeignKey("persons.id"), nullable=False)
-    message_text = Column(Text, nullable=False)
+    message_text = deferred(Column(Text, nullable=False))  # Loaded on access unless undeferred
+    normalized_text = deferred(Column(Text, nullable=True))  # New text without quoted history or signature; NULL if the same as message_text
     message_file = Column(Text, nullable=True) 
-    file_text = Column(Text, nullable=True)  # Parsed file content
+    file_text_hash = Column(String(64), ForeignKey("attachment_texts.content_hash"), nullable=True, index=True)  # SHA-256 of the parsed file text in attachment_texts
     is_draft = Column(Boolean, default=False)
+    token_count = Column(Integer, nullable=True)  # Estimated tokens of the prompt text, counted at ingestion
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_emessages_session_created", "session_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+    # Messages are addressed by message_id; message_seq is only used in SQL
+    __mapper_args__ = {"primary_key": [message_id], "exclude_properties": ["message_seq"]}
+
     # Relationships
     session = relationship(
         "SQLiteSession",
         back_populates="messages"
     )
+    attachment = relationship("SQLiteAttachmentText")
+
+    @property
+    def prompt_text(self) -> str:
+        """The message text used in prompts: the normalized body when it differs from the raw one."""
+        return self.normalized_text or self.message_text
+
+    @property
+    def file_text(self):
+        """Parsed file content, loaded and decompressed on first access."""
+        return self.attachment.text if self.attachment else None
+
+    def to_dict(self):
+        result = super().to_dict()
+        result["file_text"] = self.file_text
+        return result
+
+
+class SQLiteAttachmentText(Base):
+    """Compressed attachment text, stored once per distinct content and shared by messages."""
+    __tablename__ = "attachment_texts"
+
+    text_id = Column(Integer, primary_key=True)  # Rowid alias, the key of the attachment_texts_fts search index
+    content_hash = Column(String(64), nullable=False, unique=True)  # SHA-256 of the uncompressed text
+    compressed_text = deferred(Column(LargeBinary, nullable=False))
+    size = Column(Integer, nullable=False)  # Uncompressed length in characters
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __mapper_args__ = {"primary_key": [content_hash], "exclude_properties": ["text_id"]}
+
+    @property
+    def text(self) -> str:
+        return decompress_text(self.compressed_text)
+
+
+class SQLiteSessionSummary(Base):
+    """Rolling summary and key facts of a session, updated in the background as messages arrive."""
+    __tablename__ = "esession_summaries"
+
+    session_id = Column(SQLiteUUID(), ForeignKey("esessions.session_id"), primary_key=True)
+    summary = Column(Text, nullable=False, default="")
+    key_facts = Column(Text, nullable=False, default="[]")  # JSON list of short statements
+    message_count = Column(Integer, nullable=False, default=0)  # Sent messages covered by the summary
+    last_message_seq = Column(Integer, nullable=False, default=0)  # emessages.message_seq of the last covered message
+    generation = Column(Integer, nullable=False, default=0, server_default="0")  # esessions.summary_generation it was built in
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
 class SQLiteAISession(Base):
@@ -195,5 +271,8 @@ class SQLiteAISession(Base):
     
     session_id = Column(SQLiteUUID(), primary_key=True, default=lambda: str(uuid.uuid4()))
     esession_id = Column(SQLiteUUID(), ForeignKey("esessions.session_id"), nullable=False)
+    # Set up in the background after creation: "pending", then "ready" or "failed"
+    status = Column(String(16), nullable=False, default="pending", server_default="ready")
+    error = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
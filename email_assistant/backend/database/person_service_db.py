@@ -1,29 +1,33 @@
 from typing import Optional
 from sqlalchemy.orm import Session
 
-from .config import get_db
+from .config import SessionLocal, unit_of_work
 from .repositories import PersonRepository
 
 
 class DatabasePersonService:
     """Database-backed person service for managing persons."""
 
-    def __init__(self):
-        self.db: Optional[Session] = None
-
+    def __init__(self, db: Optional[Session] = None):
+        # Share the caller's (usually request-scoped) session, or own one opened on first use
+        self.db: Optional[Session] = db
+        self._owns_db = db is None
+    
     def _get_db(self):
         """Get database session."""
         if self.db is None:
-            self.db = next(get_db())
+            self.db = SessionLocal()
         return self.db
     
     def create_person(self, name: str, email: str, phone_number: str) -> str:
         """Create a new person in the database."""
         try:
             db = self._get_db()
-            person_repo = PersonRepository(db)
-            person = person_repo.create(full_name=name, email_address=email, phone_number=phone_number)
-            return str(person.id)
+            with unit_of_work(db):
+                person_repo = PersonRepository(db)
+                person = person_repo.create(full_name=name, email_address=email, phone_number=phone_number)
+                person_id = str(person.id)
+            return person_id
         except Exception as e:
             raise e
         
@@ -49,4 +53,10 @@ class DatabasePersonService:
                 raise ValueError("Person not found")
             return person
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+    def close(self):
+        """Close the database connection if this service opened it."""
+        if self.db and self._owns_db:
+            self.db.close()
+        self.db = None
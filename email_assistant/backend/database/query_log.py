@@ -0,0 +1,73 @@
+import logging
+import os
+import random
+import sys
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger("email_assistant.sql")
+
+# Statements slower than this (in milliseconds) are always logged
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+# Fraction (0.0 - 1.0) of all statements to log regardless of duration
+SQL_SAMPLE_RATE = float(os.getenv("SQL_SAMPLE_RATE", "0.0"))
+
+_REPOSITORY_MODULE = __name__.rsplit(".", 1)[0] + ".repositories"
+
+
+def _find_caller() -> str:
+    """Return `Repository.method` of the innermost repository frame on the stack."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        if frame.f_globals.get("__name__") == _REPOSITORY_MODULE:
+            owner = frame.f_locals.get("self")
+            name = frame.f_code.co_name
+            return f"{type(owner).__name__}.{name}" if owner is not None else name
+        frame = frame.f_back
+    return "<unknown>"
+
+
+def _redact(parameters) -> str:
+    """Describe bound parameters by type only so no user data reaches the log."""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return f"<{len(parameters)} parameter sets>"
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+    return "()"
+
+
+def install_query_logging(engine: Engine,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        sample_rate: float = SQL_SAMPLE_RATE,
+    ):
+    """Time every statement on `engine` and log the slow or sampled ones."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start_time"].pop()) * 1000
+        slow = elapsed_ms >= threshold_ms
+        if not slow and not (sample_rate > 0 and random.random() < sample_rate):
+            return
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            "%s query %.1fms in %s: %s params=%s",
+            "Slow" if slow else "Sampled",
+            elapsed_ms,
+            _find_caller(),
+            " ".join(statement.split()),
+            _redact(parameters),
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            conn.info["query_start_time"].pop()
@@ -1,11 +1,21 @@
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy.orm import Session, undefer, selectinload
+from sqlalchemy import and_, or_, text, tuple_, type_coerce, String, func, select, literal
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+import base64
+import hashlib
+import json
 import uuid
 
-from .models import SQLitePerson as Person, SQLiteSession as DBSession, SQLiteMessage as Message, SQLiteAISession as AISession
+from .config import compress_text
+from .models import SQLitePerson as Person, SQLiteSession as DBSession, SQLiteMessage as Message, SQLiteAISession as AISession, SQLiteAttachmentText as AttachmentText, SQLiteSessionSummary as SessionSummary
 
 from ..engine.utils.pdf_parser import extract_text_from_pdf
+from ..engine.utils.token_counter import count_tokens
+from ..engine.utils.email_normalizer import normalize_email_body
+
+# Repositories only flush their changes. Callers decide the transaction
+# boundary and commit through `config.unit_of_work`.
 
 
 class PersonRepository:
@@ -23,13 +33,12 @@ class PersonRepository:
             phone_number=phone_number
         )
         self.db.add(person)
-        self.db.commit()
-        self.db.refresh(person)
+        self.db.flush()
         return person
     
     def get_by_id(self, person_id: str) -> Optional[Person]:
-        """Get person by ID."""
-        return self.db.query(Person).filter(Person.id == person_id).first()
+        """Get person by ID, reusing the instance if this session already loaded it."""
+        return self.db.get(Person, person_id)
     
     def get_by_email(self, email_address: str) -> Optional[Person]:
         """Get person by email address."""
@@ -42,8 +51,7 @@ class PersonRepository:
             for key, value in kwargs.items():
                 if hasattr(person, key):
                     setattr(person, key, value)
-            self.db.commit()
-            self.db.refresh(person)
+            self.db.flush()
         return person
     
     def delete(self, person_id: str) -> bool:
@@ -51,7 +59,7 @@ class PersonRepository:
         person = self.get_by_id(person_id)
         if person:
             self.db.delete(person)
-            self.db.commit()
+            self.db.flush()
             return True
         return False
 
@@ -71,24 +79,44 @@ class SessionRepository:
             subject=subject
         )
         self.db.add(session)
-        self.db.commit()
-        self.db.refresh(session)
+        self.db.flush()
         return session
     
     def get_by_id(self, session_id: str) -> Optional[DBSession]:
-        """Get session by ID with messages and files."""
-        return self.db.query(DBSession).filter(DBSession.session_id == session_id).first()
+        """Get session by ID, reusing the instance if this session already loaded it."""
+        return self.db.get(DBSession, session_id)
+    
+    def exists(self, session_id: str) -> bool:
+        """Check whether a session exists without loading it."""
+        return self.db.query(DBSession.session_id).filter(DBSession.session_id == session_id).first() is not None
     
     def get_all(self) -> List[DBSession]:
         """Get all email sessions."""
         return self.db.query(DBSession).all()
     
+    def list_by_activity(self, limit: int = 20, cursor: Optional[str] = None, participant_id: Optional[str] = None) -> Tuple[List[DBSession], Optional[str]]:
+        """List sessions by last activity, newest first, with keyset pagination.
+
+        Returns the page and the cursor of the next page, or None on the last page.
+        """
+        # Compare the stored timestamp text as-is so the cursor matches the index exactly
+        last_message_at = type_coerce(DBSession.last_message_at, String)
+        query = self.db.query(DBSession, last_message_at)
+        if participant_id:
+            query = query.filter(or_(DBSession.sender_id == participant_id, DBSession.receiver_id == participant_id))
+        if cursor:
+            query = query.filter(tuple_(last_message_at, DBSession.session_id) < tuple(decode_cursor(cursor, 2)))
+        rows = query.order_by(last_message_at.desc(), DBSession.session_id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1][1], str(rows[-1][0].session_id)])
+        return [session for session, _ in rows], next_cursor
+    
     def update_subject(self, session_id: str, subject: str) -> Optional[DBSession]:
         """Update session subject."""
-        session = self.get_by_id(session_id)
-        if session:
+        if self.exists(session_id):
             self.db.query(DBSession).filter(DBSession.session_id == session_id).update({"subject": subject})
-            self.db.commit()
             return self.get_by_id(session_id)
         return None
     
@@ -97,7 +125,7 @@ class SessionRepository:
         session = self.get_by_id(session_id)
         if session:
             self.db.delete(session)
-            self.db.commit()
+            self.db.flush()
             return True
         return False
 
@@ -121,28 +149,154 @@ class MessageRepository:
             sender_id=sender_id,
             receiver_id=receiver_id,
             message_text=message_text,
+            **body_values(message_text),
             message_file=message_file,
-            file_text=file_text
+            file_text_hash=AttachmentTextRepository(self.db).store(file_text)
         )
         self.db.add(message)
-        self.db.commit()
-        self.db.refresh(message)
+        self.db.flush()
         return message
     
-    def get_by_id(self, message_id: str) -> Optional[Message]:
-        """Get message by ID with files."""
-        return self.db.query(Message).filter(Message.message_id == message_id).first()
+    def get_by_id(self, message_id: str, with_content: bool = False) -> Optional[Message]:
+        """Get message by ID, with message and attachment text only if `with_content` is set."""
+        query = self.db.query(Message).filter(Message.message_id == message_id)
+        if with_content:
+            query = query.options(undefer(Message.message_text), undefer(Message.normalized_text), selectinload(Message.attachment).undefer(AttachmentText.compressed_text))
+        return query.first()
+    
+    def exists(self, message_id: str) -> bool:
+        """Check whether a message exists without loading it."""
+        return self.db.query(Message.message_id).filter(Message.message_id == message_id).first() is not None
+    
+    def create_draft(self, session_id: str, sender_id: str, receiver_id: str, message_text: str) -> Message:
+        """Create a draft reply in a session."""
+        message = Message(
+            message_id=str(uuid.uuid4()),
+            session_id=session_id,
+            sender_id=sender_id,
+            receiver_id=receiver_id,
+            message_text=message_text,
+            **body_values(message_text),
+            is_draft=True,
+        )
+        self.db.add(message)
+        self.db.flush()
+        return message
     
     def get_by_session(self, session_id: str) -> List[Message]:
-        """Get all messages in a session."""
-        return self.db.query(Message).filter(Message.session_id == session_id).order_by(Message.created_at).all()
+        """Get all sent messages in a session with message and attachment text."""
+        return (
+            self.db.query(Message)
+            .options(undefer(Message.message_text), undefer(Message.normalized_text), selectinload(Message.attachment).undefer(AttachmentText.compressed_text))
+            .filter(Message.session_id == session_id, Message.is_draft.isnot(True))
+            .order_by(Message.created_at)
+            .all()
+        )
+    
+    def get_drafts_by_session(self, session_id: str) -> List[Message]:
+        """Get the draft replies of a session with their text, newest first."""
+        return (
+            self.db.query(Message)
+            .options(undefer(Message.message_text), undefer(Message.normalized_text))
+            .filter(Message.session_id == session_id, Message.is_draft.is_(True))
+            .order_by(Message.created_at.desc())
+            .all()
+        )
+    
+    def get_metadata_by_session(self, session_id: str) -> List[Dict[str, Any]]:
+        """Get IDs, participants and timestamps of the messages in a session, without any text."""
+        rows = (
+            self.db.query(
+                Message.message_id,
+                Message.sender_id,
+                Message.receiver_id,
+                Message.message_file,
+                Message.file_text_hash,
+                Message.is_draft,
+                Message.token_count,
+                Message.created_at,
+                Message.updated_at,
+            )
+            .filter(Message.session_id == session_id, Message.is_draft.isnot(True))
+            .order_by(Message.created_at)
+            .all()
+        )
+        return [dict(row._mapping) for row in rows]
     
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """Full-text search over message and attachment text, best match first."""
+        match = to_match_query(query)
+        if not match:
+            return []
+        rows = self.db.execute(
+            text(
+                f"""
+                WITH {SEARCH_HITS_SQL}
+                SELECT m.message_id, m.session_id, s.subject, m.created_at,
+                       hits.snippet, MIN(hits.rank) AS rank
+                FROM hits
+                JOIN emessages m ON m.message_seq = hits.message_seq
+                JOIN esessions s ON s.session_id = m.session_id
+                WHERE COALESCE(m.is_draft, 0) = 0
+                GROUP BY m.message_seq
+                ORDER BY rank
+                LIMIT :limit OFFSET :offset
+                """
+            ),
+            {"match": match, "limit": limit, "offset": offset},
+        )
+        return [dict(row._mapping) for row in rows]
+
+    def search_sessions(self, query: str, limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """Full-text search grouped by session, ranked by each session's best matching message."""
+        match = to_match_query(query)
+        if not match:
+            return []
+        rows = self.db.execute(
+            text(
+                f"""
+                WITH {SEARCH_HITS_SQL}
+                SELECT m.session_id, s.subject,
+                       MIN(hits.rank) AS rank,
+                       COUNT(DISTINCT m.message_seq) AS hits
+                FROM hits
+                JOIN emessages m ON m.message_seq = hits.message_seq
+                JOIN esessions s ON s.session_id = m.session_id
+                WHERE COALESCE(m.is_draft, 0) = 0
+                GROUP BY m.session_id
+                ORDER BY rank
+                LIMIT :limit OFFSET :offset
+                """
+            ),
+            {"match": match, "limit": limit, "offset": offset},
+        )
+        return [dict(row._mapping) for row in rows]
+
+    def get_sent_after(self, session_id: str, after_seq: int, limit: int) -> List[Dict[str, Any]]:
+        """Get up to `limit` sent messages of a session stored after `message_seq` `after_seq`, oldest first, with participant names."""
+        rows = self.db.execute(
+            text(
+                """
+                SELECT m.message_seq, sender.full_name AS sender, receiver.full_name AS receiver,
+                       COALESCE(m.normalized_text, m.message_text) AS message_text, m.message_file
+                FROM emessages m
+                JOIN persons sender ON sender.id = m.sender_id
+                JOIN persons receiver ON receiver.id = m.receiver_id
+                WHERE m.session_id = :session_id AND m.message_seq > :after_seq AND COALESCE(m.is_draft, 0) = 0
+                ORDER BY m.message_seq
+                LIMIT :limit
+                """
+            ),
+            {"session_id": str(session_id), "after_seq": after_seq, "limit": limit},
+        )
+        return [dict(row._mapping) for row in rows]
+
     def update_text(self, message_id: str, message_text: str) -> Optional[Message]:
         """Update message text."""
-        message = self.get_by_id(message_id)
-        if message:
-            self.db.query(Message).filter(Message.message_id == message_id).update({"message_text": message_text})
-            self.db.commit()
+        if self.exists(message_id):
+            self.db.query(Message).filter(Message.message_id == message_id).update(
+                {"message_text": message_text, **body_values(message_text)}
+            )
             return self.get_by_id(message_id)
         return None
     
@@ -151,11 +305,171 @@ class MessageRepository:
         message = self.get_by_id(message_id)
         if message:
             self.db.delete(message)
-            self.db.commit()
+            self.db.flush()
             return True
         return False
     
 
+class AttachmentTextRepository:
+    """Repository for content-addressed, compressed attachment text."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def store(self, file_text: Optional[str]) -> Optional[str]:
+        """Store attachment text once per distinct content and return its hash."""
+        if not file_text:
+            return None
+        content_hash = hashlib.sha256(file_text.encode("utf-8")).hexdigest()
+        if self.exists(content_hash):
+            return content_hash
+        text_id = self.db.execute(
+            sqlite_insert(AttachmentText)
+            .values(content_hash=content_hash, compressed_text=compress_text(file_text), size=len(file_text))
+            .on_conflict_do_nothing(index_elements=["content_hash"])
+            .returning(AttachmentText.__table__.c.text_id)
+        ).scalar()
+        if text_id is not None:
+            # Index the text once, when it is first stored
+            self.db.execute(
+                text("INSERT INTO attachment_texts_fts(rowid, file_text) VALUES (:text_id, :file_text)"),
+                {"text_id": text_id, "file_text": file_text}
+            )
+        return content_hash
+
+    def exists(self, content_hash: str) -> bool:
+        """Check whether an attachment text is stored without loading it."""
+        return self.db.query(AttachmentText.content_hash).filter(AttachmentText.content_hash == content_hash).first() is not None
+
+    def get_by_hash(self, content_hash: str) -> Optional[AttachmentText]:
+        """Get attachment text by content hash."""
+        return self.db.query(AttachmentText).filter(AttachmentText.content_hash == content_hash).first()
+
+    def delete_unreferenced(self) -> int:
+        """Delete attachment text no message refers to any more."""
+        referenced = self.db.query(Message.file_text_hash).filter(Message.file_text_hash.isnot(None))
+        count = self.db.query(AttachmentText).filter(AttachmentText.content_hash.notin_(referenced)).delete(synchronize_session=False)
+        return count
+
+
+def body_values(message_text: str) -> Dict[str, Any]:
+    """Normalized body and prompt token count of a message text, stored next to the raw text."""
+    normalized = normalize_email_body(message_text)
+    if normalized == message_text:
+        normalized = None
+    return {
+        "normalized_text": normalized,
+        "token_count": count_tokens(normalized or message_text),
+    }
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Encode keyset pagination values as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decode a cursor produced by `encode_cursor` from `size` string values."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(values, list) or len(values) != size or not all(isinstance(value, str) for value in values):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return values
+
+
+# Messages whose text matches, and messages whose attachment text matches,
+# with a snippet and the FTS5 rank (lower is better) of each hit
+SEARCH_HITS_SQL = """
+hits AS (
+    SELECT emessages_fts.rowid AS message_seq,
+           snippet(emessages_fts, 0, '[', ']', '...', 16) AS snippet,
+           emessages_fts.rank AS rank
+    FROM emessages_fts
+    WHERE emessages_fts MATCH :match
+    UNION ALL
+    SELECT m.message_seq,
+           snippet(attachment_texts_fts, 0, '[', ']', '...', 16),
+           attachment_texts_fts.rank
+    FROM attachment_texts_fts
+    JOIN attachment_texts a ON a.text_id = attachment_texts_fts.rowid
+    JOIN emessages m ON m.file_text_hash = a.content_hash
+    WHERE attachment_texts_fts MATCH :match
+)
+"""
+
+
+def to_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every term quoted, trailing `*` kept as a prefix match."""
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(terms)
+
+
+class SessionSummaryRepository:
+    """Repository for the rolling summaries of sessions."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, session_id: str) -> Optional[SessionSummary]:
+        """Get the summary of a session, if one was built."""
+        return self.db.get(SessionSummary, str(session_id))
+
+    def advance(self, session_id: str, generation: int, previous_seq: int, summary: str, key_facts: List[str], message_count: int, last_message_seq: int) -> bool:
+        """Replace a summary that still ends at `previous_seq` in summary generation `generation`.
+
+        Returns False, leaving the stored summary alone, if it was advanced since
+        `previous_seq` was read or reset (see `reset`) since `generation` was read,
+        so concurrent updates and builds racing an edit never go backwards.
+        """
+        values = {
+            "summary": summary,
+            "key_facts": json.dumps(key_facts),
+            "message_count": message_count,
+            "last_message_seq": last_message_seq,
+            "generation": generation,
+        }
+        if previous_seq == 0:
+            # Only insert while the session is still in the generation the build started in
+            source = select(literal(str(session_id)), *(literal(value) for value in values.values())).where(
+                DBSession.session_id == str(session_id), DBSession.summary_generation == generation
+            )
+            result = self.db.execute(
+                sqlite_insert(SessionSummary)
+                .from_select(["session_id", *values], source)
+                .on_conflict_do_nothing(index_elements=["session_id"])
+            )
+        else:
+            result = self.db.execute(
+                SessionSummary.__table__.update()
+                .where(
+                    SessionSummary.session_id == str(session_id),
+                    SessionSummary.generation == generation,
+                    SessionSummary.last_message_seq == previous_seq,
+                )
+                .values(**values)
+            )
+        self.db.expire_all()
+        return result.rowcount == 1
+
+    def reset(self, session_id: str):
+        """Drop the summary of a session so it is rebuilt from the first message.
+
+        Also starts a new summary generation, so builds still running on the old
+        text cannot store their result afterwards.
+        """
+        self.db.query(DBSession).filter(DBSession.session_id == str(session_id)).update(
+            {DBSession.summary_generation: DBSession.summary_generation + 1}, synchronize_session=False
+        )
+        self.db.query(SessionSummary).filter(SessionSummary.session_id == str(session_id)).delete()
+
+
 class AISessionRepository:
     """Repository for AI Session operations."""
     
@@ -169,10 +483,33 @@ class AISessionRepository:
             esession_id=esession_id,
         )
         self.db.add(session)
-        self.db.commit()
-        self.db.refresh(session)
+        self.db.flush()
         return session
     
     def get_by_id(self, session_id: str) -> Optional[AISession]:
-        """Get AI session by ID."""
-        return self.db.query(AISession).filter(AISession.session_id == session_id).first()
+        """Get AI session by ID, reusing the instance if this session already loaded it."""
+        return self.db.get(AISession, session_id)
+
+    def set_status(self, session_id: str, status: str, error: Optional[str] = None) -> bool:
+        """Record the outcome of a pending AI session's setup.
+
+        Returns False if the session is no longer pending, for example because
+        `fail_stale_pending` failed it meanwhile; that status is kept.
+        """
+        updated = self.db.query(AISession).filter(
+            AISession.session_id == session_id, AISession.status == "pending"
+        ).update({AISession.status: status, AISession.error: error}, synchronize_session="fetch")
+        return updated == 1
+
+    def fail_stale_pending(self, timeout_seconds: int, session_id: Optional[str] = None) -> int:
+        """Mark AI sessions pending for longer than `timeout_seconds` as failed. Returns how many were."""
+        query = self.db.query(AISession).filter(
+            AISession.status == "pending",
+            AISession.created_at < func.datetime("now", f"-{int(timeout_seconds)} seconds"),
+        )
+        if session_id is not None:
+            query = query.filter(AISession.session_id == session_id)
+        return query.update(
+            {AISession.status: "failed", AISession.error: "Setup was interrupted, create a new AI session"},
+            synchronize_session="fetch",
+        )
@@ -67,4 +67,78 @@ Please remember this context.
 < Context >
 {context}
 </ Context >
-"""
\ No newline at end of file
+"""
+
+attachment_prompt_template = """
+< Attachments >
+Here are the parts of the attached files most relevant to the request.
+{attachments}
+</ Attachments >
+"""
+
+thread_summary_update_prompt_template = """
+< Role >
+You keep a running summary of an email thread up to date.
+</ Role >
+
+< Thread >
+Subject: {subject}
+
+Summary so far:
+{summary}
+
+Key facts so far:
+{key_facts}
+</ Thread >
+
+< New Emails >
+{emails}
+</ New Emails >
+
+< Task >
+Update the summary and the key facts with the new emails.
+Keep the summary concise, a few short paragraphs at most, covering the whole thread.
+Key facts are short standalone statements: names, dates, amounts, decisions, commitments and open action items.
+Drop key facts that the new emails make obsolete.
+</ Task >
+"""
+
+thread_summary_prompt_template = """
+< Thread Summary >
+Here is a summary of the first {count} emails of the conversation.
+{summary}
+
+Key facts:
+{key_facts}
+</ Thread Summary >
+
+< Recent Emails >
+Here are the emails since the summary.
+{conversation}
+</ Recent Emails >
+"""
+
+chat_history_summary_prompt_template = """
+< Role >
+You keep a running summary of a chat between a user and Sox, an email assistant.
+</ Role >
+
+< Summary So Far >
+{summary}
+</ Summary So Far >
+
+< Earlier Turns >
+{turns}
+</ Earlier Turns >
+
+< Task >
+Update the summary with the earlier turns. Keep what the user asked for, what Sox answered,
+drafts that were saved, decisions and preferences the user stated, and anything still open.
+Reply with the summary only, a few short paragraphs at most.
+</ Task >
+"""
+
+chat_history_summary_message_template = """
+Summary of our earlier conversation:
+{summary}
+"""
@@ -1,8 +1,12 @@
-from typing import Literal, Annotated
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal, Annotated, Dict, Optional
 from typing_extensions import TypedDict
 from pydantic import BaseModel, Field
 
-from langchain_core.messages import AnyMessage, AIMessage, ToolMessage
+from langchain_core.messages import AnyMessage, AIMessage, HumanMessage, ToolMessage, RemoveMessage
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from langgraph.prebuilt import ToolNode, InjectedState
 from langgraph.graph import (
@@ -13,41 +17,94 @@ from langgraph.graph import (
 )
 from langgraph.types import Command
 
-from ..llm.aws_llm import AWS_LLM
+from ..llm.aws_llm import get_aws_llm
+from ..llm.fake_llm import get_fake_llm
 from ..agents.prompts import *
+from ..utils.attachment_index import attachment_index
+from ..utils.token_counter import count_tokens, count_message_tokens, truncate_tokens, MESSAGE_OVERHEAD_TOKENS
+from ...database.config import SessionLocal
+from ...database.esession_service_db import DatabaseSessionService
+from ...database.person_service_db import DatabasePersonService
+
+logger = logging.getLogger("email_assistant.sox")
+
 
 class AgentState(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
+    esession_id: str
     subject: str
     email_session: str 
+    email_messages: list  # Rendered emails with their token counts, oldest first
+    thread_summary: Optional[dict]  # Rolling summary of the first emails, see thread_summarizer
+    history_summary: Optional[str]  # Summary of the chat turns condensed by history_func
     user_profile: dict
     contact_profile: dict 
 
 class Router(BaseModel):
     result: Literal["SUMMARIZE", "MAIN"] = Field(..., description="Result from triage model")
 
+# Nodes that call a model, each of which can be configured with its own model ID
+SOX_NODES = ("triage", "main", "summarizer")
+
+# Room a node's token budget must leave for the current request after the system prompt
+MIN_REQUEST_TOKENS = 256
+
+# What happens to chat turns beyond the history limits: condensed into a summary, or dropped
+HISTORY_MODES = ("summarize", "drop")
+
 class SoxAgent:
     def __init__(self, 
-            model_provider: Literal["aws","gcp"],
+            model_provider: Literal["aws","gcp","fake"],
             model_id: str,
             checkpointer,
+            speculative: bool = False,
+            node_model_ids: Optional[Dict[str, Optional[str]]] = None,
+            token_budget: int = 100000,
+            node_token_budgets: Optional[Dict[str, Optional[int]]] = None,
+            history_max_turns: int = 0,
+            history_max_tokens: int = 0,
+            history_mode: str = "summarize",
         ):
+        # Nodes without their own model ID or prompt token budget use `model_id` and `token_budget`
+        self.node_model_ids = {
+            node: (node_model_ids or {}).get(node) or model_id for node in SOX_NODES
+        }
+        self.token_budgets = {
+            node: (node_token_budgets or {}).get(node) or token_budget for node in SOX_NODES
+        }
         if model_provider == "aws":
-            self.llm = AWS_LLM(model_id=model_id)
-        self.context = None
-        self.tools = [write_reply_to_file]
+            self.llms = {node: get_aws_llm(node_model_id) for node, node_model_id in self.node_model_ids.items()}
+        elif model_provider == "fake":
+            # Canned answers for load tests, see fake_llm
+            self.llms = {node: get_fake_llm(node_model_id) for node, node_model_id in self.node_model_ids.items()}
+        self.tools = [save_reply_draft]
         self.toolkit={
-            "write_reply_to_file": write_reply_to_file
+            "save_reply_draft": save_reply_draft
         }
         self.tool_node = ToolNode(self.tools)
 
+        # Chat history kept in the checkpointed state, see history_func. 0 means no limit.
+        if history_mode not in HISTORY_MODES:
+            raise ValueError(f"Unknown history mode: {history_mode}")
+        self.history_max_turns = history_max_turns
+        self.history_max_tokens = history_max_tokens
+        self.history_mode = history_mode
+
+        # Speculative mode runs triage and the likely branch concurrently, see speculative_triage_func
+        self.speculative = speculative
+        self.speculation_stats = {"turns": 0, "hits": 0, "tokens": 0, "wasted_tokens": 0}
+        self._stats_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(thread_name_prefix="sox-speculation") if speculative else None
+
         workflow = StateGraph(AgentState) 
-        workflow.add_node("triage_node", self.triage_func)
+        workflow.add_node("history_node", self.history_func)
+        workflow.add_node("triage_node", self.speculative_triage_func if speculative else self.triage_func)
         workflow.add_node("main_node", self.main_func)
         workflow.add_node("summarizer_node", self.summarizer_func)
         workflow.add_node("tool_node", self.tool_node)
 
-        workflow.add_edge(START, "triage_node")
+        workflow.add_edge(START, "history_node")
+        workflow.add_edge("history_node", "triage_node")
         workflow.add_edge("tool_node", "main_node")
         workflow.add_edge("summarizer_node", END)
         workflow.add_conditional_edges(
@@ -56,56 +113,322 @@ class SoxAgent:
 
         self.graph = workflow.compile(checkpointer)
 
+    def triage(self, state: AgentState, include_raw: bool = False):
+        """Call the triage model. With `include_raw` the raw message is returned as well, for token usage."""
+        inputs = self.fit_inputs(
+            "triage",
+            state,
+            lambda conversation: sox_triage_system_prompt_template.format(
+                full_name=state["user_profile"]["full_name"],
+                contact_full_name=state["contact_profile"]["full_name"],
+                conversation=conversation
+            ),
+            with_attachments=False,
+        )
+        llm_router = self.llms["triage"].with_structured_output(Router, include_raw=include_raw) # type: ignore 
+        return llm_router.invoke(inputs)
+
+    def route(self, result: str) -> str:
+        """Map a triage result to the node that handles it."""
+        if result == "SUMMARIZE":
+            return "summarizer_node"
+        elif result == "MAIN":
+            return "main_node"
+        raise ValueError(f"Unexpected triage result: {result}")
+
     def triage_func(self, state: AgentState) -> Command[
         Literal["main_node", "summarizer_node"]
     ]:
         # Call triage model to determine next steps
-        messages = state["messages"]
-        goto = "main_node" 
-        update = None
+        resposne = self.triage(state)
+        return Command(goto=self.route(resposne.result)) # type: ignore
+
+    def speculative_triage_func(self, state: AgentState, config: RunnableConfig) -> Command[
+        Literal["main_node", "summarizer_node", "tool_node", "__end__"]
+    ]:
+        """Run triage and the likely branch at the same time.
 
-        system_prompt = sox_triage_system_prompt_template.format(
-            full_name=state["user_profile"]["full_name"],
-            contact_full_name=state["contact_profile"]["full_name"],
-            conversation=state["email_session"]
+        If triage agrees with the prediction the branch's answer is used directly, so the
+        turn costs one LLM round trip. Otherwise the branch's answer is discarded and the
+        turn continues to the node triage chose.
+        """
+        predicted = self.predict_branch(state)
+        if predicted == "main_node":
+            branch = self._executor.submit(self.main_message, state) # type: ignore
+        else:
+            branch = self._executor.submit(self.summarizer_message, state, config) # type: ignore
+
+        try:
+            response = self.triage(state, include_raw=True)
+        except Exception:
+            branch.add_done_callback(self.discard_branch)
+            raise
+        if response["parsed"] is None:
+            branch.add_done_callback(self.discard_branch)
+            raise ValueError(f"Unexpected triage result: {response['parsing_error']}")
+        goto = self.route(response["parsed"].result)
+        triage_tokens = usage_tokens(response["raw"])
+
+        if goto != predicted:
+            # A request in flight cannot be interrupted, so its result is dropped when it arrives
+            if not branch.cancel():
+                branch.add_done_callback(self.discard_branch)
+            self.record_speculation(hit=False, tokens=triage_tokens)
+            return Command(goto=goto)
+
+        message = branch.result()
+        self.record_speculation(hit=True, tokens=triage_tokens + usage_tokens(message))
+        if goto == "main_node" and self.exists_action({"messages": [message]}): # type: ignore
+            return Command(goto="tool_node", update={"messages": [message]})
+        return Command(goto=END, update={"messages": [message]})
+
+    def predict_branch(self, state: AgentState) -> str:
+        """Guess the triage result from the latest request. Most turns are not summaries."""
+        question = next(
+            (m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)),
+            None
         )
-        llm_router = self.llm.with_structured_output(Router) # type: ignore 
-        resposne = llm_router.invoke(
-            [
-                {"role": "user", "content": system_prompt},
-                *messages
-            ]
+        if isinstance(question, str) and "summar" in question.lower():
+            return "summarizer_node"
+        return "main_node"
+
+    def discard_branch(self, future):
+        """Count the tokens of a losing speculative branch as wasted."""
+        if future.cancelled() or future.exception() is not None:
+            return
+        tokens = usage_tokens(future.result())
+        with self._stats_lock:
+            self.speculation_stats["tokens"] += tokens
+            self.speculation_stats["wasted_tokens"] += tokens
+
+    def record_speculation(self, hit: bool, tokens: int):
+        """Update the speculation stats with one turn and log the wasted-token ratio at DEBUG."""
+        with self._stats_lock:
+            stats = self.speculation_stats
+            stats["turns"] += 1
+            stats["hits"] += int(hit)
+            stats["tokens"] += tokens
+            report = self.speculation_report()
+        logger.debug(
+            "Speculation %s: %d/%d hits, wasted-token ratio %.1f%%",
+            "hit" if hit else "miss", report["hits"], report["turns"], report["wasted_token_ratio"] * 100,
         )
-        if resposne.result == "SUMMARIZE":  # type: ignore
-            goto = "summarizer_node"
-        elif resposne.result == "MAIN": # type: ignore
-            goto = "main_node"
-        else:
-            raise ValueError(f"Unexpected triage result: {resposne.result}") # type: ignore
 
-        return Command(goto=goto, update=update)
+    def speculation_report(self) -> dict:
+        """Return the speculation stats with the hit rate and the share of all tokens spent on discarded branches."""
+        stats = dict(self.speculation_stats)
+        stats["hit_rate"] = stats["hits"] / stats["turns"] if stats["turns"] else 0.0
+        stats["wasted_token_ratio"] = stats["wasted_tokens"] / stats["tokens"] if stats["tokens"] else 0.0
+        return stats
+
+    def record_usage(self, message):
+        """Add the tokens of a non-speculative call to the speculation stats."""
+        if self.speculative:
+            with self._stats_lock:
+                self.speculation_stats["tokens"] += usage_tokens(message)
 
     def main_func(self, state: AgentState):
-        messages = state["messages"]
-        system_prompt = sox_main_system_prompt_template.format(
-            full_name=state["user_profile"]["full_name"],
-            contact_full_name=state["contact_profile"]["full_name"],
-            user_email_address=state["user_profile"]["email_address"],
-            user_phone_number=state["user_profile"]["phone_number"],
-            contact_email_address=state["contact_profile"]["email_address"],
-            contact_phone_number=state["contact_profile"]["phone_number"],
-            conversation=state["email_session"]
-        ) 
-        message = self.llm.bind_tools(self.tools).invoke( # type: ignore
-            [
-                {"role": "user", "content": system_prompt},
-                *messages
-            ]
-        )
+        message = self.main_message(state)
+        self.record_usage(message)
         return {
             "messages": [message]
         }
+
+    def main_message(self, state: AgentState):
+        """Call the main model with tools bound and return its message."""
+        inputs = self.fit_inputs(
+            "main",
+            state,
+            lambda conversation: sox_main_system_prompt_template.format(
+                full_name=state["user_profile"]["full_name"],
+                contact_full_name=state["contact_profile"]["full_name"],
+                user_email_address=state["user_profile"]["email_address"],
+                user_phone_number=state["user_profile"]["phone_number"],
+                contact_email_address=state["contact_profile"]["email_address"],
+                contact_phone_number=state["contact_profile"]["phone_number"],
+                conversation=conversation
+            ),
+        )
+        return self.llms["main"].bind_tools(self.tools).invoke(inputs) # type: ignore
+
+    def fit_inputs(self, node: str, state: AgentState, render_system_prompt, uses_conversation: bool = True, with_attachments: bool = True, with_background: bool = True, email_messages: Optional[list] = None) -> list:
+        """Build a node's model input within the node's prompt token budget.
+
+        `render_system_prompt` renders the system prompt around a given email conversation,
+        built from `email_messages` (all emails of the session by default).
+        Context is kept in priority order until the budget is spent: the system prompt,
+        the current turn, the session background message and the summary of condensed
+        chat turns, then the email conversation
+        (newest emails first), the attachment chunks (best match first) and the earlier
+        chat turns (newest first). Whatever does not fit is left out, so a long session
+        never overflows the model's context; no message is sent empty. Raises ValueError if the budget cannot hold
+        the system prompt and at least `MIN_REQUEST_TOKENS` of the request.
+        """
+        budget = self.token_budgets[node]
+        messages = state["messages"]
+        turn_start = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=0)
+        current_turn = list(messages[turn_start:])
+        background = list(messages[:1]) if turn_start > 0 and with_background else []
+        if state.get("history_summary"):
+            # Stands in for the chat turns history_func condensed, right before the turns still kept
+            background.append(AIMessage(content=chat_history_summary_message_template.format(summary=state["history_summary"])))
+        history = list(messages[1:turn_start])
+
+        system_tokens = count_tokens(render_system_prompt(""))
+        remaining = budget - system_tokens - MESSAGE_OVERHEAD_TOKENS
+        if remaining < MIN_REQUEST_TOKENS:
+            # Truncating the request to fit would send the model an empty message
+            raise ValueError(
+                f"The {node} token budget of {budget} tokens leaves no room for the request after its "
+                f"{system_tokens} token system prompt. Set SOX_{node.upper()}_TOKEN_BUDGET (or SOX_TOKEN_BUDGET) "
+                f"to at least {system_tokens + MESSAGE_OVERHEAD_TOKENS + MIN_REQUEST_TOKENS}."
+            )
+        fitted_turn, fitted_background = [], []
+        for message in current_turn + background:
+            in_turn = len(fitted_turn) < len(current_turn)
+            tokens = count_message_tokens(message)
+            if tokens > remaining and isinstance(message.content, str):
+                message = message.model_copy(update={"content": truncate_tokens(message.content, remaining - MESSAGE_OVERHEAD_TOKENS)})
+                tokens = count_message_tokens(message)
+                if not message.content and not in_turn:
+                    # The current turn used the budget; leave the background out rather than send it empty
+                    continue
+            (fitted_turn if in_turn else fitted_background).append(message)
+            remaining -= tokens
+        current_turn, background = fitted_turn, fitted_background
+
+        conversation = ""
+        if uses_conversation:
+            conversation = self.fit_conversation(state, remaining, email_messages)
+            remaining -= count_tokens(conversation)
+
+        attachments = ""
+        if with_attachments:
+            attachments = self.attachment_prompt(state, remaining)
+            remaining -= count_tokens(attachments)
+
+        kept = []
+        for message in reversed(history):
+            tokens = count_message_tokens(message)
+            if tokens > remaining:
+                break
+            kept.insert(0, message)
+            remaining -= tokens
+        # A tool result cannot be sent without the tool call it answers
+        while kept and isinstance(kept[0], ToolMessage):
+            kept.pop(0)
+        if len(kept) < len(history):
+            logger.debug("Trimmed %d earlier chat messages from the %s prompt to fit %d tokens", len(history) - len(kept), node, budget)
+
+        return [
+            {"role": "user", "content": render_system_prompt(conversation) + attachments},
+            *background,
+            *kept,
+            *current_turn,
+        ]
+
+    def history_func(self, state: AgentState):
+        """Keep the chat history in the state within the turn and token limits.
+
+        Runs at the start of every turn. The background message (the first message)
+        and the current turn are always kept. When the earlier turns exceed a limit,
+        the oldest are removed until they are within half of it, so this happens every
+        few turns rather than on each one; with the "summarize" mode they are folded
+        into `history_summary` first. A turn is a user message with every answer,
+        tool call and tool result up to the next one, and is never split.
+        """
+        messages = state["messages"]
+        turn_starts = [i for i, m in enumerate(messages) if i > 0 and isinstance(m, HumanMessage)]
+        if len(turn_starts) < 2:
+            return {}
+        turns = [messages[start:end] for start, end in zip(turn_starts, turn_starts[1:])]
+        turn_tokens = [sum(count_message_tokens(m) for m in turn) for turn in turns]
+        over_turns = self.history_max_turns and len(turns) > self.history_max_turns
+        over_tokens = self.history_max_tokens and sum(turn_tokens) > self.history_max_tokens
+        if not (over_turns or over_tokens):
+            return {}
+
+        keep_turns = self.history_max_turns // 2 if self.history_max_turns else len(turns)
+        keep_tokens = self.history_max_tokens // 2 if self.history_max_tokens else sum(turn_tokens)
+        condensed = 0
+        while condensed < len(turns) and (
+            len(turns) - condensed > keep_turns or sum(turn_tokens[condensed:]) > keep_tokens
+        ):
+            condensed += 1
+
+        removed = [m for turn in turns[:condensed] for m in turn]
+        update = {"messages": [RemoveMessage(id=m.id) for m in removed]}  # type: ignore
+        if self.history_mode == "summarize":
+            try:
+                update["history_summary"] = self.summarize_history(state.get("history_summary"), removed)
+            except Exception as e:
+                # The turns are dropped anyway, so the history stays bounded when the model fails
+                print(f"Error summarizing chat history, dropping {condensed} turns: {e}")
+        print(f"{'Condensed' if self.history_mode == 'summarize' else 'Dropped'} {condensed} earlier chat turns ({len(removed)} messages)")
+        return update
+
+    def summarize_history(self, summary: Optional[str], messages: list) -> str:
+        """Fold chat messages into the running summary of the chat with the summarizer model."""
+        lines = []
+        for message in messages:
+            speaker = "User" if isinstance(message, HumanMessage) else "Tool" if isinstance(message, ToolMessage) else "Sox"
+            content = message.content if isinstance(message.content, str) else str(message.content)
+            for call in getattr(message, "tool_calls", None) or []:
+                content += f"\n[Called {call['name']} with {call['args']}]"
+            lines.append(f"{speaker}: {content}")
+        empty_prompt = chat_history_summary_prompt_template.format(summary=summary or "None yet.", turns="")
+        max_tokens = self.token_budgets["summarizer"] - count_tokens(empty_prompt) - MESSAGE_OVERHEAD_TOKENS
+        prompt = chat_history_summary_prompt_template.format(
+            summary=summary or "None yet.",
+            turns=truncate_tokens("\n\n".join(lines), max_tokens),
+        )
+        response = self.llms["summarizer"].invoke([{"role": "user", "content": prompt}])  # type: ignore
+        return response.content if isinstance(response.content, str) else str(response.content)
+
+    def fit_conversation(self, state: AgentState, max_tokens: int, email_messages: Optional[list] = None) -> str:
+        """Return the email conversation cut to `max_tokens`, dropping the oldest emails first."""
+        if email_messages is None:
+            email_messages = state.get("email_messages")
+        if email_messages is None:
+            # Sessions created before emails were counted one by one
+            return truncate_tokens(state["email_session"], max_tokens, keep_tail=True)
+        if sum(email["tokens"] for email in email_messages) <= max_tokens:
+            return "\n\n".join(email["text"] for email in email_messages)
+        note = "[{count} earlier emails omitted]"
+        max_tokens -= count_tokens(note.format(count=len(email_messages)))
+        if max_tokens < 0:
+            return ""
+        kept = []
+        used = 0
+        for email in reversed(email_messages):
+            if used + email["tokens"] > max_tokens:
+                break
+            kept.insert(0, email["text"])
+            used += email["tokens"]
+        return "\n\n".join([note.format(count=len(email_messages) - len(kept)), *kept])
     
+    def attachment_prompt(self, state: AgentState, max_tokens: int) -> str:
+        """Retrieve the attachment chunks relevant to the latest user request that fit in `max_tokens`."""
+        esession_id = state.get("esession_id")
+        question = next(
+            (m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)),
+            None
+        )
+        if not esession_id or not isinstance(question, str):
+            return ""
+        remaining = max_tokens - count_tokens(attachment_prompt_template.format(attachments=""))
+        selected = []
+        for chunk in attachment_index.search(esession_id, question):
+            tokens = count_tokens(chunk["text"])
+            if tokens <= remaining:
+                selected.append(chunk["text"])
+                remaining -= tokens
+        if not selected:
+            return ""
+        return attachment_prompt_template.format(
+            attachments="\n\n".join(selected)
+        )
+
     def exists_action(self, state: AgentState) -> bool:
         try:
             result = state["messages"][-1]
@@ -113,21 +436,41 @@ class SoxAgent:
         except:
             return False
         
-    def summarizer_func(self, state: AgentState):
-        messages = state["messages"]
-        system_prompt = sox_summarizer_system_prompt
-        if self.context:
-            system_prompt += context_prompt_template.format(context=str(self.context))
-        message = self.llm.invoke( # type: ignore
-            [
-                {"role": "user", "content": system_prompt},
-                *messages
-            ]
-        )
+    def summarizer_func(self, state: AgentState, config: RunnableConfig):
+        message = self.summarizer_message(state, config)
+        self.record_usage(message)
         return {
             "messages": [message]
         }
 
+    def summarizer_message(self, state: AgentState, config: RunnableConfig):
+        """Call the summarizer model and return its message."""
+        system_prompt = sox_summarizer_system_prompt
+        # Per-call context travels in the run config so one compiled agent can serve every session
+        context = config.get("configurable", {}).get("context")
+        if context:
+            system_prompt += context_prompt_template.format(context=str(context))
+        thread_summary = state.get("thread_summary")
+        if thread_summary and thread_summary.get("message_count"):
+            # Start from the summary precomputed on ingestion and read only the emails after it
+            recent = state["email_messages"][thread_summary["message_count"]:]
+            inputs = self.fit_inputs(
+                "summarizer",
+                state,
+                lambda conversation: system_prompt + thread_summary_prompt_template.format(
+                    count=thread_summary["message_count"],
+                    summary=thread_summary["summary"],
+                    key_facts="\n".join(f"- {fact}" for fact in thread_summary["key_facts"]) or "None",
+                    conversation=conversation or "None",
+                ),
+                with_background=False,
+                email_messages=recent,
+            )
+        else:
+            # The summarizer reads the conversation from the session background message
+            inputs = self.fit_inputs("summarizer", state, lambda conversation: system_prompt, uses_conversation=False)
+        return self.llms["summarizer"].invoke(inputs) # type: ignore
+
     def tool_func(self, state: AgentState):
         tool_calls = state["messages"][-1].tool_calls # type: ignore 
         results = []
@@ -152,35 +495,45 @@ class SoxAgent:
         }
     
     
+    def seed(self, config, values):
+        """Write the initial state of a thread to the checkpointer without running the graph."""
+        # Recorded as an update from a node that leads to END, so the thread waits for its first turn
+        self.graph.update_state(config, values, as_node="summarizer_node")
+
     def invoke(self, input, config, context):
-        self.context = context
+        config = {**config, "configurable": {**config.get("configurable", {}), "context": context}}
         result = self.graph.invoke(
             input=input,
             config=config,
         )
         return result
 
+def usage_tokens(message) -> int:
+    """Total tokens the model reported for a message, 0 if it reported none."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("total_tokens", 0)
+
 @tool
-def write_reply_to_file(state: Annotated[dict, InjectedState], content: str) -> str:
+def save_reply_draft(state: Annotated[dict, InjectedState], content: str) -> str:
     """
-    Write the email content to the file.
+    Save a draft reply to the email session.
 
     Args:
-    from_user: My email address
-    to_user: Email address I'm currently writing to 
-    subject: Subject of the conversation
     content: Draft of reply
     """
+    # Drafts are rows of the email session, so concurrent AI sessions never overwrite each other
+    db = SessionLocal()
     try:
+        user = DatabasePersonService(db).seek_person_by_email(state["user_profile"]["email_address"])
+        draft_id = DatabaseSessionService(db).save_draft(state["esession_id"], str(user.id), content)
         message = "From: {from_user} \n\nTo: {to_user} \n\nSubject: {subject} \n\nContent: \n\n{content}".format(
             from_user=state["user_profile"]["email_address"],
             to_user=state["contact_profile"]["email_address"],
             subject=state["subject"],
             content=content
         )
-        with open("draft.txt", 'w') as f:
-            f.write(message) 
-
-        return "Successfully wrote a reply to a file!\n\nHere is email content.\n\n" + message
-    except:
-        return "Failed to write a reply to a file!"
\ No newline at end of file
+        return f"Successfully saved a draft reply (draft ID: {draft_id})!\n\nHere is email content.\n\n" + message
+    except Exception:
+        return "Failed to save a draft reply!"
+    finally:
+        db.close()
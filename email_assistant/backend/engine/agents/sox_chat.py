@@ -1,28 +1,112 @@
+import os
 from typing import Optional, Dict, Any
 
-from langchain.schema import HumanMessage
-from langchain_core.messages import (
-    RemoveMessage
-)
+from langchain_core.messages import HumanMessage
 
 import sqlite3 
+import threading
 from langgraph.checkpoint.sqlite import SqliteSaver 
 
 from ...engine.agents.prompts import *
 from ...engine.agents.sox_agent import SoxAgent 
+from ...database.config import SQLITE_BUSY_TIMEOUT_MS
+
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "checkpoints.sqlite")
+# "aws" for Bedrock, "fake" for the canned model used by load tests
+SOX_MODEL_PROVIDER = os.getenv("SOX_MODEL_PROVIDER", "aws")
+# Model of every node, unless a node has its own below. For example a small model
+# for triage and a stronger one for the main node.
+SOX_MODEL_ID = os.getenv("SOX_MODEL_ID", "anthropic.claude-3-haiku-20240307-v1:0")
+SOX_NODE_MODEL_IDS = {
+    "triage": os.getenv("SOX_TRIAGE_MODEL_ID"),
+    "main": os.getenv("SOX_MAIN_MODEL_ID"),
+    "summarizer": os.getenv("SOX_SUMMARIZER_MODEL_ID"),
+}
+
+# Prompt token budget of every node, unless a node has its own below
+SOX_TOKEN_BUDGET = int(os.getenv("SOX_TOKEN_BUDGET", "100000"))
+SOX_NODE_TOKEN_BUDGETS = {
+    "triage": int(os.getenv("SOX_TRIAGE_TOKEN_BUDGET") or 0),
+    "main": int(os.getenv("SOX_MAIN_TOKEN_BUDGET") or 0),
+    "summarizer": int(os.getenv("SOX_SUMMARIZER_TOKEN_BUDGET") or 0),
+}
+
+# Chat history kept per AI session: older turns are condensed into a summary
+# ("summarize") or dropped ("drop") beyond either limit, 0 for no limit
+SOX_HISTORY_MAX_TURNS = int(os.getenv("SOX_HISTORY_MAX_TURNS", "10"))
+SOX_HISTORY_MAX_TOKENS = int(os.getenv("SOX_HISTORY_MAX_TOKENS", "8000"))
+SOX_HISTORY_MODE = os.getenv("SOX_HISTORY_MODE", "summarize")
+
+# Start triage and the likely branch together on every turn (see SoxAgent.speculative_triage_func)
+SOX_SPECULATIVE = os.getenv("SOX_SPECULATIVE", "false").lower() == "true"
+
+_checkpointer: Optional[SqliteSaver] = None
+_agent: Optional[SoxAgent] = None
+_agent_lock = threading.Lock()
+
+
+def get_checkpointer() -> SqliteSaver:
+    """Return the checkpointer of this process, opening the checkpoint database on first use."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _agent_lock:
+            if _checkpointer is None:
+                # Every worker process opens its own connection. SqliteSaver switches the
+                # file to WAL, and writers from other workers wait up to the busy timeout.
+                conn = sqlite3.connect(
+                    CHECKPOINT_DB_PATH,
+                    check_same_thread=False,
+                    timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                )
+                _checkpointer = SqliteSaver(conn)
+    return _checkpointer
+
+
+def close_checkpointer():
+    """Close the checkpoint database connection of this process, if it was opened."""
+    global _checkpointer, _agent
+    with _agent_lock:
+        if _checkpointer is not None:
+            _checkpointer.conn.close()
+        _checkpointer = None
+        _agent = None
+
+
+def get_agent() -> SoxAgent:
+    """Return the compiled Sox agent, building it on first use and sharing it afterwards."""
+    global _agent
+    if _agent is None:
+        checkpointer = get_checkpointer()
+        with _agent_lock:
+            if _agent is None:
+                _agent = SoxAgent(
+                    model_id=SOX_MODEL_ID,
+                    model_provider=SOX_MODEL_PROVIDER,
+                    checkpointer=checkpointer,
+                    speculative=SOX_SPECULATIVE,
+                    node_model_ids=SOX_NODE_MODEL_IDS,
+                    token_budget=SOX_TOKEN_BUDGET,
+                    node_token_budgets=SOX_NODE_TOKEN_BUDGETS,
+                    history_max_turns=SOX_HISTORY_MAX_TURNS,
+                    history_max_tokens=SOX_HISTORY_MAX_TOKENS,
+                    history_mode=SOX_HISTORY_MODE,
+                )
+    return _agent
+
+
+def speculation_report() -> Optional[Dict[str, Any]]:
+    """Return the speculation stats of this process's agent, or None if it is not built or not speculative."""
+    agent = _agent
+    if agent is None or not agent.speculative:
+        return None
+    return agent.speculation_report()
 
-conn = sqlite3.connect('checkpoints.sqlite', check_same_thread=False)
-memory = SqliteSaver(conn)
 
 class SoxChat:
     """Sox chat manager class.""" 
     def __init__(self, aisession_id: str):
         self.aisession_id = aisession_id
-        self.agent = SoxAgent(
-            model_id="anthropic.claude-3-haiku-20240307-v1:0",
-            model_provider="aws",
-            checkpointer=memory,
-        )
+        self.agent = get_agent()
     
     def initialize(self, session_info):
         """Initialize Sox chat."""
@@ -59,10 +143,17 @@ class SoxChat:
             contact_phone_number=session_info["contact_profile"]["phone_number"],
             conversation=session_info["email_session"]
         )
-        inputs = {
-            "messages": [],
+        # The background message and the session data are written straight to the
+        # checkpoint; no model is called until the user's first message
+        values = {
+            "messages": [
+                HumanMessage(content=initial_message)
+            ],
+            "esession_id": session_info["esession_id"],
             "subject": session_info["subject"],
             "email_session": session_info["email_session"], 
+            "email_messages": session_info["email_messages"],
+            "thread_summary": session_info.get("thread_summary"),
             "user_profile": session_info["user_profile"],
             "contact_profile": session_info["contact_profile"],
         }
@@ -71,23 +162,7 @@ class SoxChat:
                 "thread_id": self.aisession_id,
             }
         }
-        result = self.agent.invoke(
-            input=inputs,
-            config=config,
-            context=None
-        )
-        # agent_state = self.agent.graph.get_state(config=config)  # type: ignore
-        # remove_messages = []
-        # for i in range(1, len(agent_state.values["messages"])):
-        #     remove_messages.append(RemoveMessage(id=agent_state.values["messages"][i].id))
-        self.agent.graph.update_state(
-            config, # type: ignore
-            {
-                "messages": [
-                    {"role": "user", "content": initial_message}
-                ]
-            }
-        )
+        self.agent.seed(config, values)
     
     def invoke_with_checkpointer(self, message, context):
         """Invoke Sox with a checkpointer."""
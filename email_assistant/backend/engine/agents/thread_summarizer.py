@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Any
+
+from pydantic import BaseModel, Field
+
+from ..agents.prompts import thread_summary_update_prompt_template
+from ..utils.token_counter import truncate_tokens
+from ...database.config import SessionLocal, unit_of_work
+from ...database.repositories import SessionRepository, MessageRepository, SessionSummaryRepository
+
+# Every sent message updates the rolling summary of its session in the background,
+# so AI sessions and summary requests start from it instead of reading the whole thread.
+# Off by default: each sent message then costs a model call, and one-shot CLI runs would wait for it on exit.
+THREAD_SUMMARIES = os.getenv("THREAD_SUMMARIES", "false").lower() == "true"
+THREAD_SUMMARY_MODEL_ID = os.getenv("THREAD_SUMMARY_MODEL_ID") or os.getenv("SOX_MODEL_ID", "anthropic.claude-3-haiku-20240307-v1:0")
+THREAD_SUMMARY_WORKERS = int(os.getenv("THREAD_SUMMARY_WORKERS", "2"))
+# Same provider as Sox, so load tests with the fake model never call Bedrock
+THREAD_SUMMARY_PROVIDER = os.getenv("SOX_MODEL_PROVIDER", "aws")
+
+# New messages folded into the summary per model call, and the tokens kept of each
+SUMMARY_BATCH_MESSAGES = 20
+SUMMARY_MESSAGE_TOKENS = 2000
+
+
+class ThreadSummary(BaseModel):
+    summary: str = Field(..., description="Concise summary of the whole email thread")
+    key_facts: List[str] = Field(default_factory=list, description="Short standalone key facts of the thread")
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = set()
+# Striped per-session locks, so one session is never updated twice at once without a lock per session ever seen
+SESSION_LOCK_STRIPES = 64
+_session_locks = [threading.Lock() for _ in range(SESSION_LOCK_STRIPES)]
+_lock = threading.Lock()
+
+
+def schedule_summary_update(session_id: str):
+    """Queue a background update of a session's summary. Updates already queued for it absorb this one."""
+    global _executor
+    if not THREAD_SUMMARIES:
+        return
+    session_id = str(session_id)
+    with _lock:
+        if session_id in _pending:
+            return
+        _pending.add(session_id)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=THREAD_SUMMARY_WORKERS, thread_name_prefix="thread-summary")
+        _executor.submit(_run_update, session_id)
+
+
+def _run_update(session_id: str):
+    with _lock:
+        # Messages added from now on schedule another update
+        _pending.discard(session_id)
+    with _session_locks[hash(session_id) % SESSION_LOCK_STRIPES]:
+        try:
+            update_summary(session_id)
+        except Exception as e:
+            print(f"Error updating summary of session {session_id}: {e}")
+
+
+def shutdown():
+    """Stop the summary workers of this process. Queued updates are dropped; the next message queues them again."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        _pending.clear()
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def update_summary(session_id: str) -> int:
+    """Fold the messages not yet covered into the session's summary. Returns the number of messages added."""
+    db = SessionLocal()
+    added = 0
+    try:
+        while True:
+            with unit_of_work(db):
+                session = SessionRepository(db).get_by_id(session_id)
+                if not session:
+                    return added
+                generation = session.summary_generation
+                stored = SessionSummaryRepository(db).get(session_id)
+                previous = {
+                    "summary": stored.summary if stored else "",
+                    "key_facts": json.loads(stored.key_facts) if stored else [],
+                    "message_count": stored.message_count if stored else 0,
+                    "last_message_seq": stored.last_message_seq if stored else 0,
+                }
+                subject = session.subject or ""
+                messages = MessageRepository(db).get_sent_after(session_id, previous["last_message_seq"], SUMMARY_BATCH_MESSAGES)
+            if not messages:
+                return added
+
+            # The model call runs outside any transaction, so it holds no connection or lock
+            result = summarize_increment(subject, previous["summary"], previous["key_facts"], messages)
+
+            with unit_of_work(db):
+                advanced = SessionSummaryRepository(db).advance(
+                    session_id,
+                    generation,
+                    previous["last_message_seq"],
+                    summary=result.summary,
+                    key_facts=result.key_facts,
+                    message_count=previous["message_count"] + len(messages),
+                    last_message_seq=messages[-1]["message_seq"],
+                )
+            if not advanced:
+                # Another worker advanced or an edit reset the summary meanwhile; start again from it
+                continue
+            added += len(messages)
+    finally:
+        db.close()
+
+
+def summarize_increment(subject: str, summary: str, key_facts: List[str], messages: List[Dict[str, Any]]) -> ThreadSummary:
+    """Ask the model for the summary and key facts updated with `messages`."""
+    emails = []
+    for message in messages:
+        email = f"From: {message['sender']}\nTo: {message['receiver']}\nMessage: {truncate_tokens(message['message_text'], SUMMARY_MESSAGE_TOKENS)}"
+        if message["message_file"]:
+            email += "\nAttached File: " + os.path.basename(message["message_file"])
+        emails.append(email)
+
+    prompt = thread_summary_update_prompt_template.format(
+        subject=subject,
+        summary=summary or "None yet.",
+        key_facts="\n".join(f"- {fact}" for fact in key_facts) or "None yet.",
+        emails="\n\n".join(emails),
+    )
+    # Imported on first use so ingestion does not load the LLM stack at startup
+    if THREAD_SUMMARY_PROVIDER == "fake":
+        from ..llm.fake_llm import get_fake_llm as get_llm
+    else:
+        from ..llm.aws_llm import get_aws_llm as get_llm
+    llm = get_llm(THREAD_SUMMARY_MODEL_ID).with_structured_output(ThreadSummary)
+    return llm.invoke([{"role": "user", "content": prompt}])  # type: ignore
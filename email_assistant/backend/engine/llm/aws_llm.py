@@ -1,13 +1,9 @@
 import os 
 from dotenv import load_dotenv
 
-from langchain_core.pydantic_v1 import BaseModel, Field
-from langchain_core.output_parsers import PydanticOutputParser 
-
-from langchain_aws import ChatBedrock, ChatBedrockConverse 
+from functools import lru_cache
 
-import boto3 
-from botocore.config import Config 
+from langchain_core.pydantic_v1 import BaseModel, Field
 
 from typing import Any
 
@@ -16,19 +12,23 @@ from ..llm.base import BaseLLM
 _ = load_dotenv("../../../../../../.env")
 
 aws_region = os.getenv("AWS_REGION", "us-east-1")
-bedrock_config = Config(
-    connect_timeout=120, 
-    read_timeout=120,
-    retries={"max_attempts": 0,},
-)
 
-bedrock_rt = boto3.client(
-    "bedrock-runtime",
-    region_name=aws_region,
-    config=bedrock_config,
-)
 
-bedrock = boto3.client("bedrock", region_name=aws_region, config=bedrock_config)
+# boto3 and langchain_aws take hundreds of milliseconds to import, so they are
+# loaded and the clients are built on first use instead of at import time.
+@lru_cache(maxsize=None)
+def get_bedrock_client(service_name: str = "bedrock-runtime"):
+    """Return the shared boto3 client for a Bedrock service, creating it on first use."""
+    import boto3
+    from botocore.config import Config
+
+    bedrock_config = Config(
+        connect_timeout=120, 
+        read_timeout=120,
+        retries={"max_attempts": 0,},
+    )
+    return boto3.client(service_name, region_name=aws_region, config=bedrock_config)
+
 
 class AWS_LLM(BaseLLM):
     """AWS Bedrock LLM implementation."""
@@ -36,14 +36,19 @@ class AWS_LLM(BaseLLM):
     def __init__(self, model_id: str = "anthropic.claude-3-haiku-20240307-v1:0", region: str = 'us-east-1', temperature: float = 0.7):
         self.model_id = model_id
         self.temperature = temperature
-        self.client = bedrock_rt
+        from langchain_aws import ChatBedrock, ChatBedrockConverse
+
+        # Every model shares the one Bedrock runtime client of the process
+        self.client = get_bedrock_client("bedrock-runtime")
         self.model = ChatBedrock(
             model=model_id,
             region=region,
+            client=self.client,
             model_kwargs={"temperature": 0},
         )
         self.conv_model = ChatBedrockConverse(
             model=model_id,
+            client=self.client,
         )
 
     def invoke(self, messages, **kwargs):
@@ -64,8 +69,14 @@ class AWS_LLM(BaseLLM):
     def return_tool_calling_model(self, tools) -> Any:
         return self.conv_model.bind_tools(tools)
     
-    def with_structured_output(self, schema):
-        return self.conv_model.with_structured_output(schema)
+    def with_structured_output(self, schema, **kwargs):
+        return self.conv_model.with_structured_output(schema, **kwargs)
     
     def bind_tools(self, tools):
-        return self.conv_model.bind_tools(tools)
\ No newline at end of file
+        return self.conv_model.bind_tools(tools)
+
+
+@lru_cache(maxsize=None)
+def get_aws_llm(model_id: str) -> AWS_LLM:
+    """Return the shared AWS_LLM for a model ID, so nodes configured with the same model reuse one instance."""
+    return AWS_LLM(model_id=model_id, region=aws_region)
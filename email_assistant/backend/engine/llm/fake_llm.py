@@ -0,0 +1,108 @@
+import os
+import random
+import time
+from functools import lru_cache
+from typing import Any, List, Literal, get_args, get_origin
+
+from langchain_core.messages import AIMessage, ToolMessage
+
+from ..llm.base import BaseLLM
+
+# Simulated model round trip, so load tests see realistic concurrency without calling Bedrock
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))
+FAKE_LLM_JITTER = 0.3
+
+
+def _text(message) -> str:
+    """Text content of a LangChain message or a {"role", "content"} dict."""
+    content = message.get("content", "") if isinstance(message, dict) else getattr(message, "content", "")
+    return content if isinstance(content, str) else str(content)
+
+
+def _usage(messages, output: str) -> dict:
+    """Rough token usage, about four characters per token."""
+    input_tokens = sum(len(_text(m)) for m in messages) // 4
+    output_tokens = len(output) // 4
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+class _FakeStructured:
+    """Structured output runnable: fills the schema from the last message."""
+
+    def __init__(self, llm: "FakeLLM", schema, include_raw: bool):
+        self.llm = llm
+        self.schema = schema
+        self.include_raw = include_raw
+
+    def invoke(self, messages, **kwargs):
+        self.llm.wait()
+        request = _text(messages[-1]).lower() if messages else ""
+        values = {}
+        for name, field in self.schema.model_fields.items():
+            if get_origin(field.annotation) is Literal:
+                # The choice named in the request (e.g. SUMMARIZE for "summarize this"), else the last one
+                choices = get_args(field.annotation)
+                values[name] = next((c for c in choices if str(c).lower()[:6] in request), choices[-1])
+            elif get_origin(field.annotation) in (list, List):
+                values[name] = [f"Fake fact {i + 1}" for i in range(3)]
+            else:
+                values[name] = f"Fake {name} of {len(messages)} messages."
+        parsed = self.schema(**values)
+        if not self.include_raw:
+            return parsed
+        raw = AIMessage(content="", usage_metadata=_usage(messages, str(values)))
+        return {"raw": raw, "parsed": parsed, "parsing_error": None}
+
+
+class _FakeToolCalling:
+    """Tool calling runnable: calls the first tool when the request asks for a draft, once per turn."""
+
+    def __init__(self, llm: "FakeLLM", tools):
+        self.llm = llm
+        self.tools = tools
+
+    def invoke(self, messages, **kwargs):
+        last = messages[-1] if messages else None
+        if self.tools and last is not None and not isinstance(last, ToolMessage) and "draft" in _text(last).lower():
+            self.llm.wait()
+            tool_call = {"name": self.tools[0].name, "args": {"content": "Fake draft reply."}, "id": f"call_{random.getrandbits(32):08x}"}
+            return AIMessage(content="", tool_calls=[tool_call], usage_metadata=_usage(messages, ""))
+        return self.llm.invoke(messages)
+
+
+class FakeLLM(BaseLLM):
+    """Canned model for load tests. Answers after `latency_ms` (with jitter) and never leaves the process."""
+
+    def __init__(self, model_id: str = "fake", latency_ms: float = FAKE_LLM_LATENCY_MS):
+        self.model_id = model_id
+        self.latency_ms = latency_ms
+
+    def wait(self):
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000 * random.uniform(1 - FAKE_LLM_JITTER, 1 + FAKE_LLM_JITTER))
+
+    def invoke(self, messages, **kwargs):
+        self.wait()
+        content = f"Fake answer from {self.model_id} to: {_text(messages[-1])[:80]}" if messages else "Fake answer."
+        return AIMessage(content=content, usage_metadata=_usage(messages, content))
+
+    async def generate_structured_output(self, messages, schema, **kwargs):
+        return self.with_structured_output(schema).invoke(messages)
+
+    async def tool_call(self, messages, tools):
+        return self.bind_tools(tools).invoke(messages)
+
+    def return_tool_calling_model(self, tools) -> Any:
+        return self.bind_tools(tools)
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs):
+        return _FakeStructured(self, schema, include_raw)
+
+    def bind_tools(self, tools):
+        return _FakeToolCalling(self, tools)
+
+
+@lru_cache(maxsize=None)
+def get_fake_llm(model_id: str) -> FakeLLM:
+    """Return the shared FakeLLM for a model ID."""
+    return FakeLLM(model_id=model_id)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import zlib
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+ATTACHMENT_INDEX_DIR = os.getenv("ATTACHMENT_INDEX_DIR", "./attachment_index")
+ATTACHMENT_TOP_K = int(os.getenv("ATTACHMENT_TOP_K", "4"))
+
+# Hashed term-frequency vectors: no vocabulary to fit, so chunks can be appended one message at a time
+VECTOR_DIM = 2 ** 12
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def chunk_text(text: str, size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    """Split text into overlapping chunks of about `size` characters, preferring paragraph breaks."""
+    text = text.strip()
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            # Cut at the last paragraph or sentence break inside the window if there is one
+            cut = max(text.rfind("\n\n", start, end), text.rfind(". ", start, end))
+            if cut > start + size // 2:
+                end = cut + 1
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def embed(texts: List[str]) -> np.ndarray:
+    """Embed texts as L2-normalised, sublinear hashed term-frequency vectors."""
+    # NumPy is imported on first use to keep it off the startup path
+    import numpy as np
+
+    vectors = np.zeros((len(texts), VECTOR_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in _TOKEN_RE.findall(text.lower()):
+            vectors[row, zlib.crc32(token.encode()) % VECTOR_DIM] += 1.0
+    np.log1p(vectors, out=vectors)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class AttachmentIndex:
+    """On-disk vector index of attachment chunks, one memory-mapped matrix per email session."""
+
+    def __init__(self, index_dir: str = ATTACHMENT_INDEX_DIR):
+        self.index_dir = index_dir
+
+    def _paths(self, session_id: str):
+        base = os.path.join(self.index_dir, str(session_id))
+        return base + ".npy", base + ".json"
+
+    @contextmanager
+    def _locked(self, session_id: str):
+        """Hold an exclusive lock on a session's index across processes while updating it."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        with open(os.path.join(self.index_dir, f"{session_id}.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self, session_id: str):
+        import numpy as np
+
+        vectors_path, chunks_path = self._paths(session_id)
+        if not os.path.exists(vectors_path):
+            return None, []
+        with open(chunks_path) as f:
+            chunks = json.load(f)
+        return np.load(vectors_path, mmap_mode="r"), chunks
+
+    def add(self, session_id: str, message_id: str, text: str) -> int:
+        """Chunk and index the attachment text of one message. Returns the number of chunks added."""
+        return self.add_many(session_id, [(message_id, text)])
+
+    def add_many(self, session_id: str, attachments: List[Tuple[str, str]]) -> int:
+        """Chunk and index the attachment texts of several messages of a session with one embedding
+        call and one write. `attachments` holds (message_id, text) pairs. Returns the number of chunks added."""
+        import numpy as np
+
+        new_chunks = [
+            {"message_id": str(message_id), "text": chunk}
+            for message_id, text in attachments
+            for chunk in chunk_text(text or "")
+        ]
+        if not new_chunks:
+            return 0
+        os.makedirs(self.index_dir, exist_ok=True)
+        new_vectors = embed([c["text"] for c in new_chunks])
+        # Workers append to the same files, so the read-modify-write must not interleave
+        with self._locked(session_id):
+            vectors, chunks = self._load(session_id)
+            if vectors is not None:
+                new_vectors = np.vstack([vectors, new_vectors])
+            vectors_path, chunks_path = self._paths(session_id)
+            # Write side files first and swap them in, so readers never see a half-written index
+            with open(vectors_path + ".tmp", "wb") as f:
+                np.save(f, new_vectors)
+            with open(chunks_path + ".tmp", "w") as f:
+                json.dump(chunks + new_chunks, f)
+            os.replace(chunks_path + ".tmp", chunks_path)
+            os.replace(vectors_path + ".tmp", vectors_path)
+        return len(new_chunks)
+
+    def exists(self, session_id: str) -> bool:
+        """Whether a session has an index on disk."""
+        return os.path.exists(self._paths(session_id)[0])
+
+    def search(self, session_id: str, query: str, top_k: int = ATTACHMENT_TOP_K) -> List[Dict[str, Any]]:
+        """Return the `top_k` chunks of a session most similar to `query`."""
+        import numpy as np
+
+        vectors, chunks = self._load(session_id)
+        if vectors is None or not query.strip():
+            return []
+        # Weight terms by inverse document frequency over this session's chunks
+        idf = np.log((1 + len(chunks)) / (1 + np.count_nonzero(vectors, axis=0))) + 1
+        scores = (vectors @ (embed([query])[0] * idf * idf)).astype(np.float32)
+        top = np.argsort(-scores)[:top_k]
+        return [
+            {**chunks[i], "score": float(scores[i])}
+            for i in top if scores[i] > 0
+        ]
+
+    def drop(self, session_id: str):
+        """Remove the index of a session."""
+        with self._locked(session_id):
+            for path in self._paths(session_id):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+attachment_index = AttachmentIndex()
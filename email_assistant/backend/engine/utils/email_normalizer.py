@@ -0,0 +1,88 @@
+import re
+
+# Replies and forwards repeat the earlier thread below the new text. Prompts
+# already hold every message of the session, so only the new text is kept.
+
+# "On Mon, Jan 1, 2024 at 10:00 AM John <john@example.com> wrote:", possibly wrapped over two lines
+_REPLY_HEADER_RE = re.compile(r"^On\s.+\s(wrote|writes):\s*$", re.IGNORECASE)
+# A reply header names when ("10:00", "2024", "1/2/24") or who ("<john@example.com>") wrote the quote
+_REPLY_HEADER_DETAIL_RE = re.compile(r"\d{1,2}:\d{2}|\b\d{4}\b|\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b|<[^<>\s]+@[^<>\s]+>")
+_ORIGINAL_MESSAGE_RE = re.compile(r"^-{2,}\s*Original Message\s*-{2,}\s*$", re.IGNORECASE)
+_FORWARD_MARKER_RE = re.compile(r"^(-{2,}\s*Forwarded message\s*-{2,}|Begin forwarded message:)\s*$", re.IGNORECASE)
+_HEADER_FIELD_RE = re.compile(r"^(From|Sent|Date|To|Cc|Bcc|Subject|Reply-To):\s", re.IGNORECASE)
+# Only the RFC 3676 delimiter "-- "; a bare "--" is often a separator inside the body
+_SIGNATURE_DELIMITER_RE = re.compile(r"^-- $")
+_MOBILE_SIGNATURE_RE = re.compile(r"^(Sent from my \w[\w ]*|Get Outlook for \w+)\s*$", re.IGNORECASE)
+
+
+def _quote_follows(lines, i) -> bool:
+    """Whether the first non-blank line from line `i` on is quoted with ">"."""
+    following = next((line.strip() for line in lines[i:] if line.strip()), "")
+    return following.startswith(">")
+
+
+def _is_reply_header(lines, i) -> bool:
+    """Whether a reply header starts at line `i`, on one line or wrapped over two.
+
+    Only a header with a date or an address that quoted lines follow counts, so
+    a sentence like "On the budget, finance writes:" stays part of the message.
+    """
+    line = lines[i].strip()
+    if not line.lower().startswith("on "):
+        return False
+    for header, end in ((line, i + 1), (f"{line} {lines[i + 1].strip()}" if i + 1 < len(lines) else "", i + 2)):
+        if _REPLY_HEADER_RE.match(header):
+            return bool(_REPLY_HEADER_DETAIL_RE.search(header)) and _quote_follows(lines, end)
+    return False
+
+
+def _is_header_block(lines, i) -> bool:
+    """Whether an Outlook style "From: / Sent: / Subject:" block of a quoted message starts at line `i`.
+
+    The block must follow a blank line; header-like lines inside a paragraph are text.
+    """
+    if not lines[i].lower().startswith("from:") or i == 0 or lines[i - 1].strip():
+        return False
+    fields = {line.split(":", 1)[0].lower() for line in lines[i:i + 6] if _HEADER_FIELD_RE.match(line)}
+    return len(fields) >= 3 and "subject" in fields
+
+
+def normalize_email_body(text: str) -> str:
+    """Return the new text of an email: quoted history, reply and forward headers and signatures removed.
+
+    The text of a forwarded message is kept, without its header block. Quoted (">")
+    lines are dropped only when they end the message; quotes answered inline stay.
+    If nothing is left, for example in a bare forward, the original text is returned.
+    """
+    if not text:
+        return text
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    kept = []
+    forward_header = None  # "marker" right after a forward marker, "fields" inside its header block
+    for i, raw_line in enumerate(lines):
+        line = raw_line.strip()
+        if forward_header:
+            if _HEADER_FIELD_RE.match(line):
+                forward_header = "fields"
+                continue
+            if not line:
+                # A blank line ends the header block, or precedes it
+                forward_header = None if forward_header == "fields" else forward_header
+                continue
+            forward_header = None
+        if _FORWARD_MARKER_RE.match(line):
+            forward_header = "marker"
+            continue
+        if _is_reply_header(lines, i) or _ORIGINAL_MESSAGE_RE.match(line) or (kept and _is_header_block(lines, i)):
+            break
+        if _SIGNATURE_DELIMITER_RE.match(raw_line):
+            break
+        if _MOBILE_SIGNATURE_RE.match(line):
+            continue
+        kept.append(raw_line.rstrip())
+    # The quoted earlier thread below a reply that has no header
+    while kept and (not kept[-1].strip() or kept[-1].lstrip().startswith(">")):
+        kept.pop()
+
+    normalized = re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).strip()
+    return normalized or text.strip()
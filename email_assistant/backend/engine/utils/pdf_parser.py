@@ -1,10 +1,10 @@
 # import fitz
 
-from pdfminer.high_level import extract_text
-
-
 
 def extract_text_from_pdf(file_path):
+    # pdfminer is only needed when a message carries an attachment
+    from pdfminer.high_level import extract_text
+
     try:
         text = extract_text(file_path)
         return text
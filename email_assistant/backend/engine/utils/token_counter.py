@@ -0,0 +1,62 @@
+import json
+import re
+from typing import Any
+
+# A local approximation of the model's BPE tokenizer. Words are split into
+# pieces of up to CHARS_PER_TOKEN characters, every punctuation mark or symbol
+# and every non-ASCII character counts as one token. This overestimates common
+# English words, which keeps the budgets on the safe side.
+CHARS_PER_TOKEN = 4
+# Role and separator tokens the model adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_PIECE_RE = re.compile(r"[A-Za-z0-9_]+|[^\sA-Za-z0-9_]")
+TRUNCATION_MARKER = "[...]"
+
+
+def _piece_tokens(piece: str) -> int:
+    if piece[0].isascii():
+        return -(-len(piece) // CHARS_PER_TOKEN)
+    return 1
+
+
+def count_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    if not text:
+        return 0
+    return sum(_piece_tokens(piece) for piece in _PIECE_RE.findall(text))
+
+
+def count_message_tokens(message: Any) -> int:
+    """Estimate the tokens of a chat message (LangChain message or role/content dict), tool calls included."""
+    if isinstance(message, dict):
+        content, tool_calls = message.get("content"), message.get("tool_calls")
+    else:
+        content, tool_calls = getattr(message, "content", ""), getattr(message, "tool_calls", None)
+    if not isinstance(content, str):
+        content = json.dumps(content, default=str)
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(content)
+    if tool_calls:
+        tokens += count_tokens(json.dumps(tool_calls, default=str))
+    return tokens
+
+
+def truncate_tokens(text: str, max_tokens: int, keep_tail: bool = False) -> str:
+    """Cut a text to at most `max_tokens` tokens, keeping its start (or its end with `keep_tail`)."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Leave room for the marker that shows where the text was cut
+    max_tokens -= count_tokens(TRUNCATION_MARKER)
+    if max_tokens <= 0:
+        return ""
+    pieces = list(_PIECE_RE.finditer(text))
+    if keep_tail:
+        pieces.reverse()
+    tokens = 0
+    for i, piece in enumerate(pieces):
+        tokens += _piece_tokens(piece.group())
+        if tokens > max_tokens:
+            if keep_tail:
+                return TRUNCATION_MARKER + text[pieces[i - 1].start():] if i else ""
+            return text[:piece.start()] + TRUNCATION_MARKER
+    return text
@@ -1,16 +1,56 @@
+import os
+import sys
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from .database.config import engine
+
 from.api.person_routes import router as person_router
 from .api.esession_routes import router as esession_router
 from .api.aisession_routes import router as aisession_router
+from .api.admission import llm_admission
+from .api.compression import CompressionMiddleware
+from .services import aisession_jobs
+from .engine.agents import thread_summarizer
+
+# Build the Sox agent when a worker starts instead of on its first AI request
+PRELOAD_AGENT = os.getenv("PRELOAD_AGENT", "false").lower() == "true"
+
+SOX_CHAT_MODULE = __package__ + ".engine.agents.sox_chat"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Set up and tear down the resources of one worker process."""
+    # Connections are per process: drop any inherited from a parent process without closing them
+    engine.dispose(close=False)
+    # Sessions a crashed or killed worker was still setting up would otherwise stay pending forever
+    interrupted = aisession_jobs.fail_interrupted()
+    if interrupted:
+        print(f"Marked {interrupted} interrupted AI session setups as failed")
+    if PRELOAD_AGENT:
+        from .engine.agents.sox_chat import get_agent
+        get_agent()
+    yield
+    # Let queued AI session setups finish before their checkpoint database closes
+    aisession_jobs.shutdown()
+    thread_summarizer.shutdown()
+    # Only close the checkpoint database if this worker ever loaded the agent
+    sox_chat = sys.modules.get(SOX_CHAT_MODULE)
+    if sox_chat is not None:
+        sox_chat.close_checkpointer()
+    engine.dispose()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Email Assistant Agent API",
     description="AI-powered email assistant with session management",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -22,6 +62,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (session fetches) for clients that accept it
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(person_router)
 app.include_router(esession_router)
@@ -41,5 +84,16 @@ async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "engine": "langgraph"}
 
+@app.get("/metrics")
+async def metrics():
+    """Load of this worker: in-flight and queued LLM requests, admission totals and Sox speculation stats."""
+    result = {"llm_admission": llm_admission.stats()}
+    # Read the stats only if this worker loaded the agent, so /metrics never loads the AI stack
+    sox_chat = sys.modules.get(SOX_CHAT_MODULE)
+    report = sox_chat.speculation_report() if sox_chat is not None else None
+    if report is not None:
+        result["sox_speculation"] = report
+    return result
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
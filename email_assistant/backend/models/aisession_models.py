@@ -5,14 +5,26 @@ from typing import Optional, Dict, Any
 class AISessionCreateRequest(BaseModel):
     """Request model for email assistant agent session deletion."""
     esession_id: str = Field(..., description="Session ID from email service")
+    callback_url: Optional[str] = Field(None, description="URL to POST the setup result to when the session is ready or failed")
 
 
 class AISessionCreateResponse(BaseModel):
     """Response model for email assistant agent session creation."""
     success: bool = Field(..., description="Whether the operation was successful")
     aisession_id: str = Field(..., description="The created session ID")
+    status: str = Field(..., description="Setup status: pending, ready or failed")
     message: str = Field(..., description="Status message")
 
+class AISessionStatusRequest(BaseModel):
+    """Request model for the setup status of an AI session."""
+    aisession_id: str = Field(..., description="AI session ID")
+
+class AISessionStatusResponse(BaseModel):
+    """Response model for the setup status of an AI session."""
+    aisession_id: str = Field(..., description="AI session ID")
+    status: str = Field(..., description="Setup status: pending, ready or failed")
+    error: Optional[str] = Field(None, description="Why the setup failed")
+
 class AISessionChatRequest(BaseModel):
     """Request model for chat with sox.""" 
     aisession_id: str = Field(..., description="AI session ID")
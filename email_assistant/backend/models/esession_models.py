@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 
 class ESessionCreateRequest(BaseModel):
@@ -59,6 +59,7 @@ class ESessionChatResponse(BaseModel):
 class ESessionFetchRequest(BaseModel):
     """Request model for session fetch."""
     session_id: str = Field(..., description="The session ID")
+    include_content: bool = Field(True, description="Whether to include message and attachment text")
     
     
 class ESessionFetchResponse(BaseModel):
@@ -66,3 +67,59 @@ class ESessionFetchResponse(BaseModel):
     success: bool = Field(..., description="Whether the operation was successful")
     response: Optional[Dict[str, Any]] = Field(..., description="Result message")
     message: str = Field(..., description="Status message") 
+
+
+class ESessionDraftRequest(BaseModel):
+    """Request model for saving a draft reply."""
+    session_id: str = Field(..., description="The session ID")
+    sender_id: str = Field(..., description="User ID of the participant writing the draft")
+    message_text: str = Field(..., description="The draft text")
+
+
+class ESessionDraftResponse(BaseModel):
+    """Response model for saving a draft reply."""
+    success: bool = Field(..., description="Whether the operation was successful")
+    draft_id: str = Field(..., description="The created draft message ID")
+    message: str = Field(..., description="Status message")
+
+
+class ESessionDraftsRequest(BaseModel):
+    """Request model for fetching the drafts of a session."""
+    session_id: str = Field(..., description="The session ID")
+
+
+class ESessionDraftsResponse(BaseModel):
+    """Response model for fetching the drafts of a session."""
+    success: bool = Field(..., description="Whether the operation was successful")
+    drafts: List[Dict[str, Any]] = Field(..., description="Draft replies, newest first")
+    message: str = Field(..., description="Status message")
+
+
+class ESessionSearchRequest(BaseModel):
+    """Request model for full-text session search."""
+    query: str = Field(..., description="Search terms, a trailing * matches a prefix")
+    limit: int = Field(20, ge=1, le=100, description="Maximum number of sessions and messages to return")
+    offset: int = Field(0, ge=0, description="Number of results to skip")
+
+
+class ESessionSearchResponse(BaseModel):
+    """Response model for full-text session search."""
+    success: bool = Field(..., description="Whether the operation was successful")
+    sessions: List[Dict[str, Any]] = Field(..., description="Matching sessions ranked by their best message")
+    messages: List[Dict[str, Any]] = Field(..., description="Matching messages with highlighted snippets")
+    message: str = Field(..., description="Status message")
+
+
+class ESessionListRequest(BaseModel):
+    """Request model for listing sessions by last activity."""
+    limit: int = Field(20, ge=1, le=100, description="Maximum number of sessions to return")
+    cursor: Optional[str] = Field(None, description="Cursor returned by the previous page")
+    participant_id: Optional[str] = Field(None, description="Only sessions this person sent or received")
+
+
+class ESessionListResponse(BaseModel):
+    """Response model for listing sessions by last activity."""
+    success: bool = Field(..., description="Whether the operation was successful")
+    sessions: List[Dict[str, Any]] = Field(..., description="Sessions with thread stats, most recently active first")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, empty on the last page")
+    message: str = Field(..., description="Status message")
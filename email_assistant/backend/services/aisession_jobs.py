@@ -0,0 +1,95 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any
+from urllib.parse import urlsplit
+
+from ..database.aisession_service_db import AISessionService
+
+# AI sessions are set up by this pool after `/aisession/create` has answered
+AISESSION_WORKERS = int(os.getenv("AISESSION_WORKERS", "4"))
+WEBHOOK_TIMEOUT_SECONDS = 10.0
+# Setup takes milliseconds; a session still pending after this was lost with its worker
+AISESSION_SETUP_TIMEOUT_SECONDS = int(os.getenv("AISESSION_SETUP_TIMEOUT_SECONDS", "60"))
+# Hosts a `callback_url` may point to. Empty (the default) refuses every callback URL,
+# so callers cannot make the server POST to internal or metadata addresses.
+AISESSION_CALLBACK_HOSTS = {
+    host.strip().lower() for host in os.getenv("AISESSION_CALLBACK_HOSTS", "").split(",") if host.strip()
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+class CallbackNotAllowed(Exception):
+    """Raised when a callback URL is not http(s) or its host is not in AISESSION_CALLBACK_HOSTS."""
+
+
+def check_callback_url(callback_url: str):
+    """Raise CallbackNotAllowed unless the webhook URL is http(s) on an allowed host."""
+    parts = urlsplit(callback_url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise CallbackNotAllowed("callback_url must be an http or https URL")
+    if parts.hostname.lower() not in AISESSION_CALLBACK_HOSTS:
+        raise CallbackNotAllowed(f"callback_url host {parts.hostname} is not in AISESSION_CALLBACK_HOSTS")
+
+
+def submit_initialization(aisession_id: str, session_info: Dict[str, Any], callback_url: Optional[str] = None):
+    """Queue the setup of a new AI session. Its status moves from pending to ready or failed."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=AISESSION_WORKERS, thread_name_prefix="aisession-create")
+    return _executor.submit(run_initialization, aisession_id, session_info, callback_url)
+
+
+def run_initialization(aisession_id: str, session_info: Dict[str, Any], callback_url: Optional[str] = None):
+    """Seed the Sox conversation of an AI session, record the outcome and notify the webhook, if any."""
+    status, error = "ready", None
+    try:
+        from ..engine.agents.sox_chat import SoxChat
+        SoxChat(aisession_id=aisession_id).initialize(session_info)
+    except Exception as e:
+        status, error = "failed", str(e)
+        print(f"Error creating AI session {aisession_id}: {e}")
+
+    ai_session_service = AISessionService()
+    try:
+        if not ai_session_service.set_status(aisession_id, status, error):
+            # The setup outlived AISESSION_SETUP_TIMEOUT_SECONDS and was failed meanwhile; report the stored status
+            stored = ai_session_service.get_status(aisession_id) or {}
+            status, error = stored.get("status", "failed"), stored.get("error")
+    finally:
+        ai_session_service.close()
+
+    if callback_url:
+        notify(callback_url, {"aisession_id": aisession_id, "status": status, "error": error})
+
+
+def notify(callback_url: str, payload: Dict[str, Any]):
+    """POST a job result to a webhook. Failures are logged, the status stays available by polling."""
+    import httpx
+
+    try:
+        check_callback_url(callback_url)
+        httpx.post(callback_url, json=payload, timeout=WEBHOOK_TIMEOUT_SECONDS).raise_for_status()
+    except (httpx.HTTPError, CallbackNotAllowed) as e:
+        print(f"Error calling webhook {callback_url} for AI session {payload['aisession_id']}: {e}")
+
+
+def fail_interrupted(session_id: Optional[str] = None) -> int:
+    """Mark sessions whose setup outlived AISESSION_SETUP_TIMEOUT_SECONDS as failed, e.g. after a worker crashed."""
+    ai_session_service = AISessionService()
+    try:
+        return ai_session_service.fail_stale_pending(AISESSION_SETUP_TIMEOUT_SECONDS, session_id)
+    finally:
+        ai_session_service.close()
+
+
+def shutdown():
+    """Wait for the queued AI session setups of this process to finish."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
@@ -3,54 +3,86 @@ from dotenv import load_dotenv
 
 from typing import Optional, Dict, Any
 
+from fastapi import Depends
+from sqlalchemy.orm import Session
 
+from ..database.config import get_db
 from ..database.aisession_service_db import AISessionService
 from ..database.esession_service_db import DatabaseSessionService
 from ..database.person_service_db import DatabasePersonService 
+from ..engine.utils.token_counter import count_tokens
+from . import aisession_jobs
+
+
+class AISessionNotReady(Exception):
+    """Raised when chatting in an AI session whose setup is still running or failed."""
+
+
+class AISessionNotFound(Exception):
+    """Raised when chatting in an AI session that does not exist."""
 
-from ..engine.agents.sox_chat import SoxChat 
 
 class SessionService:
     """Service layer for session management and AI coordination using the database."""
 
-    def __init__(self):
-        self.ai_session_service = AISessionService()
-
-    async def create_session(self, esession_id: str) -> str:
-        """Create a new session using the database service."""
-        aisession_id = self.ai_session_service.create_session(esession_id)
+    def __init__(self, db: Session = Depends(get_db)):
+        # All database services of a request share its session
+        self.ai_session_service = AISessionService(db)
+        self.db_session_service = DatabaseSessionService(db)
+        self.db_person_service = DatabasePersonService(db)
 
+    async def create_session(self, esession_id: str, callback_url: Optional[str] = None) -> str:
+        """Create a new AI session and queue its setup. Returns at once; the session starts out pending."""
+        if callback_url:
+            aisession_jobs.check_callback_url(callback_url)
         # Fetch session info from email service 
-        db_session_service = DatabaseSessionService() 
-        session_info = db_session_service.get_session_info(esession_id) 
+        session_info = self.db_session_service.get_session_info(esession_id) 
+        if not session_info:
+            raise ValueError(f"Email session {esession_id} not found")
 
         _ = load_dotenv("../../../../.env")
         self_user_email = os.getenv("SELF_USER_EMAIL")
 
-        db_person_service = DatabasePersonService() 
-        self_person = db_person_service.seek_person_by_email(str(self_user_email))
+        self_person = self.db_person_service.seek_person_by_email(str(self_user_email))
         self_user_id = self_person.id
 
-        session_info = sanitize_session_info(session_info, self_user_id)
+        session_info = sanitize_session_info(session_info, self_user_id, self.db_person_service)
+        # Precomputed on ingestion, so summaries start from it instead of the whole thread
+        session_info["thread_summary"] = self.db_session_service.get_thread_summary(esession_id)
 
-        # Invoke Sox - email assistant agent initially
-        sox_chat = SoxChat(
-            aisession_id=aisession_id,
-        ) 
-        sox_chat.initialize(session_info) 
+        aisession_id = self.ai_session_service.create_session(esession_id)
+
+        # Invoke Sox - email assistant agent initially, in the background
+        aisession_jobs.submit_initialization(aisession_id, session_info, callback_url)
 
         return aisession_id
 
+    def get_status(self, aisession_id: str) -> Optional[Dict[str, Any]]:
+        """Get the setup status of an AI session, or None if it does not exist."""
+        status = self.ai_session_service.get_status(aisession_id)
+        if status and status["status"] == "pending" and self._fail_if_stale(aisession_id):
+            status = self.ai_session_service.get_status(aisession_id)
+        return status
+
+    def _fail_if_stale(self, aisession_id: str) -> bool:
+        """Mark a pending session failed if its setup was lost, e.g. with a crashed worker."""
+        return self.ai_session_service.fail_stale_pending(aisession_jobs.AISESSION_SETUP_TIMEOUT_SECONDS, aisession_id) > 0
+
     def chat_with_sox(self, aisession_id: str, message: str, context: Optional[Dict[str, Any]] = None):
         """Chat with Sox using the database service."""
-        ai_session = self.ai_session_service.get_session(aisession_id)
-        esession_id = str(ai_session.esession_id)
-        
-        # Fetch session info from email service 
-        db_session_service = DatabaseSessionService() 
-        session_info = db_session_service.get_session_info(esession_id) 
-
-        # session_info = sanitize_session_info(session_info)
+        # The email session is already in the checkpointed agent state
+        try:
+            session = self.ai_session_service.get_session(aisession_id)
+        except ValueError:
+            raise AISessionNotFound(f"AI session {aisession_id} not found")
+        if session.status == "pending" and self._fail_if_stale(aisession_id):
+            session = self.ai_session_service.get_session(aisession_id)
+        if session.status == "pending":
+            raise AISessionNotReady(f"AI session {aisession_id} is still being created")
+        if session.status == "failed":
+            raise AISessionNotReady(f"AI session {aisession_id} could not be created: {session.error}")
+
+        from ..engine.agents.sox_chat import SoxChat
 
         sox_chat = SoxChat(
             aisession_id=aisession_id,
@@ -59,20 +91,20 @@ class SessionService:
         
         return response
     
-def sanitize_session_info(session_info, self_user_id):
+def sanitize_session_info(session_info, self_user_id, db_person_service: DatabasePersonService):
     """Sanitize session info.""" 
     def message_template(msg) -> str:
         result = ""
         result += "From: " + msg["from"]
         result += "\nTo: " + msg["to"] 
         result += "\nMessage: " + msg["message_text"] 
-        if msg["file_text"]:
-            result += "\nAttached File: \n" + msg["file_text"]
+        if msg["message_file"]:
+            # Attachment text is retrieved per request from the attachment index
+            result += "\nAttached File: " + os.path.basename(msg["message_file"])
         return result
 
-    db_person_service = DatabasePersonService()
-
     sanitized_session_info = {
+        "esession_id": str(session_info["session_id"]),
         "subject": session_info["subject"],
     }
 
@@ -104,8 +136,10 @@ def sanitize_session_info(session_info, self_user_id):
         {
             "from": person_data[msg["sender_id"]]["full_name"],
             "to": person_data[msg["receiver_id"]]["full_name"],
-            "message_text": msg["message_text"],
-            "file_text": msg["file_text"] if msg["file_text"] else "",
+            # Without quoted history and signatures, see engine/utils/email_normalizer.py
+            "message_text": msg.get("normalized_text") or msg["message_text"],
+            "message_file": msg["message_file"] if msg["message_file"] else "",
+            "token_count": msg.get("token_count"),
         } for msg in session_info["messages"]
     ]
 
@@ -128,4 +162,15 @@ def sanitize_session_info(session_info, self_user_id):
 
     sanitized_session_info["email_session"] = email_session
 
+    # Rendered emails with token counts, so the agent can fit the conversation to a token budget.
+    # The message text count is cached on the row; only the short header is counted here.
+    sanitized_session_info["email_messages"] = []
+    for msg in sanitized_messages:
+        rendered = message_template(msg)
+        if msg["token_count"] is None:
+            tokens = count_tokens(rendered)
+        else:
+            tokens = msg["token_count"] + count_tokens(rendered.replace(msg["message_text"], "", 1))
+        sanitized_session_info["email_messages"].append({"text": rendered, "tokens": tokens})
+
     return sanitized_session_info
\ No newline at end of file
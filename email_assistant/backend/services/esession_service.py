@@ -1,15 +1,19 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 
 import os
 from dotenv import load_dotenv
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from ..database.config import get_db
 from ..database.esession_service_db import DatabaseSessionService
 
 class SessionService:
     """Service layer for session management and AI coordination using the database."""
 
-    def __init__(self):
-        self.db_service = DatabaseSessionService()
+    def __init__(self, db: Session = Depends(get_db)):
+        self.db_service = DatabaseSessionService(db)
 
     async def create_session(self, sender_id: str, receiver_id: str, subject: str) -> str:
         """Create a new session using the database service."""
@@ -24,5 +28,17 @@ class SessionService:
     async def add_message(self, session_id: str, sender_id: str, receiver_id, message_text: str, file_path: Optional[str]) -> str:
         return await self.db_service.add_message(session_id, sender_id, receiver_id, message_text, file_path)
     
-    def fetch_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-        return self.db_service.get_session_info(session_id)
\ No newline at end of file
+    async def save_draft(self, session_id: str, sender_id: str, message_text: str) -> str:
+        return self.db_service.save_draft(session_id, sender_id, message_text)
+
+    async def fetch_drafts(self, session_id: str) -> Optional[List[Dict[str, Any]]]:
+        return self.db_service.get_drafts(session_id)
+    
+    def fetch_session(self, session_id: str, include_content: bool = True) -> Optional[Dict[str, Any]]:
+        return self.db_service.get_session_info(session_id, include_content)
+
+    def list_sessions(self, limit: int, cursor: Optional[str], participant_id: Optional[str]) -> Dict[str, Any]:
+        return self.db_service.list_sessions(limit, cursor, participant_id)
+
+    def search(self, query: str, limit: int, offset: int) -> Dict[str, Any]:
+        return self.db_service.search(query, limit, offset)
\ No newline at end of file
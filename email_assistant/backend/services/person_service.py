@@ -1,10 +1,14 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from ...backend.database.config import get_db
 from ...backend.database.person_service_db import DatabasePersonService 
 
 class PersonService:
     """Service layer for person management using the database."""
 
-    def __init__(self):
-        self.db_service = DatabasePersonService()
+    def __init__(self, db: Session = Depends(get_db)):
+        self.db_service = DatabasePersonService(db)
 
     async def create_person(self, name: str, email: str, phone_number: str) -> str:
         """Create a new person using the database service."""
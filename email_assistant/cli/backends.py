@@ -8,9 +8,25 @@ from .fastapi_backend import FastAPIBackend
 
 load_dotenv()
 fastapi_base_url = os.environ.get("FASTAPI_BASE_URL", "http://localhost:8000")
+# "fastapi" talks to a running server over HTTP, "local" calls the service layer in process
+backend_name = os.environ.get("EMAIL_ASSISTANT_BACKEND", "fastapi")
+# Ask the server for compressed responses; worth turning off on a fast local link
+compression = os.environ.get("EMAIL_ASSISTANT_COMPRESSION", "true").lower() == "true"
 
 def get_backend(**kwargs: Any):
     """Return a backend instance by name. Extend with cloud backends later."""
+    name = kwargs.get("name", backend_name)
+    if name == "local":
+        # Imported here so the HTTP client does not load the server stack
+        from .local_backend import LocalBackend
+        return LocalBackend()
+    if name != "fastapi":
+        raise ValueError(f"Unknown backend: {name}")
     base_url = kwargs.get("base_url", fastapi_base_url)
-    return FastAPIBackend(base_url=base_url)
+    return FastAPIBackend(
+        base_url=base_url,
+        http2=kwargs.get("http2", False),
+        max_connections=kwargs.get("max_connections", 10),
+        compression=kwargs.get("compression", compression),
+    )
     
\ No newline at end of file
@@ -1,19 +1,39 @@
 from __future__ import annotations
 
-from typing import List, Dict, Any, Protocol
+import time
+from typing import List, Dict, Any, Optional, Protocol
+
+AISESSION_POLL_INTERVAL = 0.5
+AISESSION_WAIT_TIMEOUT = 300.0
 
 
 class BaseEmailAssistantBackend(Protocol):
 	"""Protocol for Email Assitant backends. Implementations should be stateless.
 	
+	Person operations:
+	- person_create: create a new person and return person ID
+
 	Session management operations:
 	- session_create: create a new session and return session ID
 	- session_delete: delete a session by ID
 	- session_edit: edit a message in a session
 	- session_chat: add a message to a session and get response
+	- session_fetch: fetch a session with its messages
+	- session_drafts: fetch the draft replies of a session
+	- session_list: list sessions by last activity
+	- session_search: full-text search over messages and attachments
+
+	AI session operations:
+	- aisession_create: create an AI session on an email session
+	- aisession_status: get the setup status of an AI session
+	- chat_with_sox: chat with Sox in an AI session
 	"""
 
-	def session_create(self) -> str:
+	def person_create(self, name: str, email: str, phone_number: str) -> str:
+		"""Create a new person and return person ID."""
+		...
+
+	def session_create(self, sender_id: str, receiver_id: str, subject: str) -> str:
 		"""Create a new session and return session ID."""
 		...
 
@@ -25,6 +45,52 @@ class BaseEmailAssistantBackend(Protocol):
 		"""Edit a message in a session. Returns success status."""
 		...
 
-	def session_chat(self, session_id: str, message_content: str) -> str:
+	def session_chat(self, session_id: str, sender_id: str, receiver_id: str, message_text: str, file_path: Optional[str]) -> str:
 		"""Add a message to a session and get response."""
-		... 
\ No newline at end of file
+		...
+
+	def session_fetch(self, session_id: str) -> Optional[Dict[str, Any]]:
+		"""Fetch a session with its messages."""
+		...
+
+	def session_drafts(self, session_id: str) -> List[Dict[str, Any]]:
+		"""Fetch the draft replies of a session, newest first."""
+		...
+
+	def session_list(self, limit: int = 20, cursor: Optional[str] = None, participant_id: Optional[str] = None) -> Dict[str, Any]:
+		"""List sessions by last activity. Returns sessions and the next page cursor."""
+		...
+
+	def session_search(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+		"""Search sessions by message and attachment text."""
+		...
+
+	def aisession_create(self, esession_id: str, wait: bool = True) -> str:
+		"""Create an AI session and return AI session ID, once it is ready unless `wait` is False."""
+		...
+
+	def aisession_status(self, aisession_id: str) -> Dict[str, Any]:
+		"""Get the setup status (pending, ready or failed) of an AI session."""
+		...
+
+	def chat_with_sox(self, aisession_id: str, message: str, context: Optional[Dict[str, Any]]) -> str:
+		"""Chat with Sox and return its response."""
+		...
+
+	def close(self) -> None:
+		"""Release connections held by the backend."""
+		...
+
+
+def wait_for_aisession(backend: BaseEmailAssistantBackend, aisession_id: str, timeout: float = AISESSION_WAIT_TIMEOUT) -> str:
+	"""Poll an AI session until its setup has finished. Returns its ID, or raises if the setup failed or timed out."""
+	deadline = time.monotonic() + timeout
+	while True:
+		status = backend.aisession_status(aisession_id)
+		if status["status"] == "ready":
+			return aisession_id
+		if status["status"] == "failed":
+			raise Exception(f"AI session {aisession_id} could not be created: {status.get('error')}")
+		if time.monotonic() >= deadline:
+			raise Exception(f"AI session {aisession_id} was not ready after {timeout:.0f}s")
+		time.sleep(AISESSION_POLL_INTERVAL)
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, IO
+
+from .backends import get_backend
+
+
+# Batch commands take the same arguments as their CLI counterparts
+BATCH_COMMANDS: Dict[str, Callable[[Any, Dict[str, Any]], Any]] = {
+    "person_create": lambda backend, args: backend.person_create(args["name"], args["email"], args["phone_number"]),
+    "session_create": lambda backend, args: backend.session_create(args["sender_id"], args["receiver_id"], args["subject"]),
+    "session_delete": lambda backend, args: backend.session_delete(args["session_id"]),
+    "session_edit": lambda backend, args: backend.session_edit(args["session_id"], args["element_id"], args["content"]),
+    "session_chat": lambda backend, args: backend.session_chat(
+        args["session_id"], args["sender_id"], args["receiver_id"], args["message_text"], args.get("file_path")
+    ),
+    "session_fetch": lambda backend, args: backend.session_fetch(args["session_id"]),
+    "session_drafts": lambda backend, args: backend.session_drafts(args["session_id"]),
+    "session_list": lambda backend, args: backend.session_list(
+        args.get("limit", 20), args.get("cursor"), args.get("participant_id")
+    ),
+    "session_search": lambda backend, args: backend.session_search(
+        args["query"], args.get("limit", 20), args.get("offset", 0)
+    ),
+    "aisession_create": lambda backend, args: backend.aisession_create(args["esession_id"], not args.get("no_wait", False)),
+    "aisession_status": lambda backend, args: backend.aisession_status(args["aisession_id"]),
+    "aisession_chat": lambda backend, args: backend.chat_with_sox(args["aisession_id"], args["message"], args.get("context")),
+}
+
+
+def run_command(backend, line_number: int, line: str) -> Dict[str, Any]:
+    """Run one JSONL command line and return its result record."""
+    start = time.perf_counter()
+    record: Dict[str, Any] = {"line": line_number}
+    try:
+        request = json.loads(line)
+        record["id"] = request.get("id")
+        record["command"] = request.get("command")
+        if record["command"] not in BATCH_COMMANDS:
+            raise ValueError(f"Unknown command: {record['command']}")
+        record["result"] = BATCH_COMMANDS[record["command"]](backend, request.get("args", {}))
+        record["success"] = True
+    except KeyError as e:
+        record["success"] = False
+        record["error"] = f"Missing argument: {e}"
+    except Exception as e:
+        record["success"] = False
+        record["error"] = str(e)
+    record["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    return record
+
+
+def run_batch(input_file: IO[str], output_file: IO[str], concurrency: int = 4, http2: bool = False) -> int:
+    """Run JSONL commands over one shared keep-alive client and write JSONL results in input order.
+
+    Each input line looks like `{"id": "1", "command": "session_fetch", "args": {"session_id": "..."}}`.
+    Returns the number of failed commands.
+    """
+    backend = get_backend(http2=http2, max_connections=concurrency)
+    lines = [(number, line) for number, line in enumerate(input_file, start=1) if line.strip()]
+    failures = 0
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            records = executor.map(lambda item: run_command(backend, *item), lines)
+            for record in records:
+                failures += not record["success"]
+                output_file.write(json.dumps(record, default=str) + "\n")
+                output_file.flush()
+    finally:
+        backend.close()
+    print(f"Ran {len(lines)} commands, {failures} failed", file=sys.stderr)
+    return failures
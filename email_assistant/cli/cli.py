@@ -1,10 +1,13 @@
 from __future__ import annotations
 
 import argparse
+import json
 import sys
 from typing import Optional
 
 from .backends import get_backend
+from .batch import run_batch
+from .load_test import DEFAULT_MIX, format_report, run_load_test
 
 
 HELP_MESSAGE = """
@@ -16,6 +19,12 @@ Available commands:
 3. session_delete <id>     - Delete session with given ID
 4. session_edit <id> <msg_id> <content> - Edit message in session
 5. session_chat <id> <content> - Add message to session and get response
+6. session_search <query>  - Full-text search over messages and attachments
+7. session_list            - List sessions by last activity
+8. batch                   - Run commands from a JSONL file over one connection
+9. session_drafts <id>     - Show the draft replies of a session
+10. aisession_status <id>  - Show whether an AI session is ready
+11. load_test              - Drive the API with a mix of requests and report throughput and latency
 
 Examples:
   python -m email_assistant help
@@ -23,6 +32,13 @@ Examples:
   python -m email_assistant session_delete --session_id abc123
   python -m email_assistant session_edit --session_id abc123 --element_id 1 --content "Updated content"
   python -m email_assistant session_chat --session_id abc123 --content "Hello"
+  python -m email_assistant session_search --query "kickoff meet*" --limit 10
+  python -m email_assistant session_list --limit 20 --participant_id abc123
+  python -m email_assistant session_drafts --session_id abc123
+  python -m email_assistant aisession_create --esession_id abc123 --no_wait
+  python -m email_assistant aisession_status --aisession_id def456
+  python -m email_assistant batch --input commands.jsonl --output results.jsonl --concurrency 8
+  python -m email_assistant load_test --concurrency 16 --duration 60 --output load_test.json
 """
 
 
@@ -128,7 +144,60 @@ def handle_session_fetch(session_id: str) -> int:
         print(f"Error fetching of session {session_id}: {e}") 
         return 1 
     
-def handle_aisession_create(esession_id: str) -> int:
+def handle_session_drafts(session_id: str) -> int:
+    """Show the draft replies of a session."""
+    try:
+        backend = get_backend()
+        drafts = backend.session_drafts(session_id)
+        print(f"Session {session_id} has {len(drafts)} drafts")
+        for draft in drafts:
+            print(f"{draft['message_id']}  {draft['created_at']}")
+            print(f"    {draft['message_text']}")
+        return 0
+    except Exception as e:
+        print(f"Error fetching drafts of session {session_id}: {e}")
+        return 1
+
+
+def handle_session_list(limit: int, cursor: Optional[str], participant_id: Optional[str]) -> int:
+    """List sessions by last activity."""
+    try:
+        backend = get_backend()
+        response = backend.session_list(limit, cursor, participant_id)
+        for session in response["sessions"]:
+            print(f"{session['session_id']}  {session['last_message_at']}  ({session['message_count']} messages)  {session['subject']}")
+            if session["last_message_preview"]:
+                print(f"    {session['last_message_preview']}")
+        if response["next_cursor"]:
+            print(f"Next page: --cursor {response['next_cursor']}")
+        return 0
+    except Exception as e:
+        print(f"Error listing sessions: {e}")
+        return 1
+
+
+def handle_session_search(query: str, limit: int, offset: int) -> int:
+    """Search sessions by message and attachment text."""
+    if not query:
+        print("Error: query is required")
+        return 1
+
+    try:
+        backend = get_backend()
+        response = backend.session_search(query, limit, offset)
+        print(f"Sessions matching '{query}':")
+        for session in response["sessions"]:
+            print(f"  {session['session_id']}  ({session['hits']} hits)  {session['subject']}")
+        print(f"Messages matching '{query}':")
+        for message in response["messages"]:
+            print(f"  {message['message_id']}  session {message['session_id']}")
+            print(f"    {message['snippet']}")
+        return 0
+    except Exception as e:
+        print(f"Error searching sessions: {e}")
+        return 1
+
+def handle_aisession_create(esession_id: str, wait: bool = True) -> int:
     """Create a new AI session."""
     if not esession_id:
         print("Error: Email Session ID is required") 
@@ -136,7 +205,7 @@ def handle_aisession_create(esession_id: str) -> int:
     
     try:
         backend = get_backend()
-        response = backend.aisession_create(esession_id)  
+        response = backend.aisession_create(esession_id, wait)  
         print(f"Created AI session successfully") 
         print(f"Response: {response}") 
         return 0 
@@ -144,6 +213,19 @@ def handle_aisession_create(esession_id: str) -> int:
         print(f"Error creating a new AI session") 
         return 1 
     
+def handle_aisession_status(aisession_id: str) -> int:
+    """Show the setup status of an AI session."""
+    try:
+        backend = get_backend()
+        status = backend.aisession_status(aisession_id)
+        print(f"AI session {aisession_id} is {status['status']}")
+        if status.get("error"):
+            print(f"    {status['error']}")
+        return 0
+    except Exception as e:
+        print(f"Error getting status of AI session {aisession_id}: {e}")
+        return 1
+
 def handle_aisession_chat(aisession_id, message, context):
     """Chat with AI email assistant, Sox."""
     if not aisession_id or not message:
@@ -161,6 +243,55 @@ def handle_aisession_chat(aisession_id, message, context):
 
 
 
+def handle_batch(input_path: str, output_path: str, concurrency: int, http2: bool) -> int:
+    """Run JSONL commands and write JSONL results."""
+    if concurrency < 1:
+        print("Error: concurrency must be at least 1")
+        return 1
+
+    try:
+        input_file = sys.stdin if input_path == "-" else open(input_path)
+        output_file = sys.stdout if output_path == "-" else open(output_path, "w")
+        try:
+            failures = run_batch(input_file, output_file, concurrency, http2)
+        finally:
+            if input_file is not sys.stdin:
+                input_file.close()
+            if output_file is not sys.stdout:
+                output_file.close()
+        return 1 if failures else 0
+    except ImportError as e:
+        print(f"Error: HTTP/2 needs the h2 package (pip install 'httpx[http2]'): {e}")
+        return 1
+    except Exception as e:
+        print(f"Error running batch: {e}")
+        return 1
+
+
+def handle_load_test(url: Optional[str], mix: str, concurrency: int, duration: float, interval: float, sessions: int,
+                     pdf_path: Optional[str], fake_llm_latency_ms: float, output_path: Optional[str], seed: Optional[int]) -> int:
+    """Run a load test, print its summary and write the JSON report."""
+    if concurrency < 1 or duration <= 0 or interval <= 0 or sessions < 1:
+        print("Error: concurrency and sessions must be at least 1, duration and interval positive")
+        return 1
+
+    try:
+        report = run_load_test(url, mix, concurrency, duration, interval, sessions, pdf_path, fake_llm_latency_ms, seed)
+    except Exception as e:
+        print(f"Error running load test: {e}")
+        return 1
+
+    if output_path == "-":
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+        if output_path:
+            with open(output_path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"\nReport written to {output_path}")
+    return 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="email-assistant",
@@ -207,9 +338,50 @@ def build_parser() -> argparse.ArgumentParser:
     fetch_parser = subparsers.add_parser("session_fetch", help="Fetch all the details of session") 
     fetch_parser.add_argument("--session_id", required=True, help="Session ID") 
 
+    # Session drafts command
+    drafts_parser = subparsers.add_parser("session_drafts", help="Show the draft replies of a session")
+    drafts_parser.add_argument("--session_id", required=True, help="Session ID")
+
+    # Session list command
+    list_parser = subparsers.add_parser("session_list", help="List sessions by last activity")
+    list_parser.add_argument("--limit", type=int, default=20, help="Maximum number of sessions")
+    list_parser.add_argument("--cursor", required=False, help="Cursor printed by the previous page")
+    list_parser.add_argument("--participant_id", required=False, help="Only sessions this person sent or received")
+
+    # Session search command
+    search_parser = subparsers.add_parser("session_search", help="Full-text search over messages and attachments")
+    search_parser.add_argument("--query", required=True, help="Search terms, a trailing * matches a prefix")
+    search_parser.add_argument("--limit", type=int, default=20, help="Maximum number of results")
+    search_parser.add_argument("--offset", type=int, default=0, help="Number of results to skip")
+
+    # Batch command
+    batch_parser = subparsers.add_parser("batch", help="Run commands from a JSONL file over one connection")
+    batch_parser.add_argument("--input", default="-", help="JSONL file of commands, - for stdin")
+    batch_parser.add_argument("--output", default="-", help="JSONL file for results, - for stdout")
+    batch_parser.add_argument("--concurrency", type=int, default=4, help="Number of commands in flight")
+    batch_parser.add_argument("--http2", action="store_true", help="Use HTTP/2 (needs the h2 package)")
+
+    # Load test command
+    load_test_parser = subparsers.add_parser("load_test", help="Drive the API with a mix of requests and report throughput and latency")
+    load_test_parser.add_argument("--url", required=False, help="Base URL of a running server; without it the app runs in process with a fake LLM")
+    load_test_parser.add_argument("--mix", default=DEFAULT_MIX, help="Weighted operations, e.g. session_fetch=6,sox_chat=1")
+    load_test_parser.add_argument("--concurrency", type=int, default=8, help="Number of requests in flight")
+    load_test_parser.add_argument("--duration", type=float, default=30, help="Seconds to drive the load")
+    load_test_parser.add_argument("--interval", type=float, default=5, help="Seconds per entry of the report timeline")
+    load_test_parser.add_argument("--sessions", type=int, default=10, help="Email sessions created for the operations to use")
+    load_test_parser.add_argument("--pdf_path", required=False, help="PDF to attach; must exist on the server (default: a generated sample)")
+    load_test_parser.add_argument("--fake_llm_latency_ms", type=float, default=300, help="Response time of the in-process fake LLM")
+    load_test_parser.add_argument("--output", required=False, help="Write the JSON report to this file, - for stdout")
+    load_test_parser.add_argument("--seed", type=int, required=False, help="Random seed for the operation mix")
+
     # AI session create command 
     aisession_create_parser = subparsers.add_parser("aisession_create", help="Create a AI session") 
     aisession_create_parser.add_argument("--esession_id", required=True, help="Email session the user is interested in") 
+    aisession_create_parser.add_argument("--no_wait", action="store_true", help="Return the AI session ID without waiting until it is ready")
+
+    # AI session status command
+    aisession_status_parser = subparsers.add_parser("aisession_status", help="Show whether an AI session is ready")
+    aisession_status_parser.add_argument("--aisession_id", required=True, help="AI session ID")
 
     # AI session chat 
     aisession_chat_parser = subparsers.add_parser("aisession_chat", help="Chat with Sox - AI assistant") 
@@ -240,8 +412,23 @@ def main(argv: Optional[list[str]] = None) -> None:
         sys.exit(handle_session_chat(args.session_id, args.sender_id, args.receiver_id, args.message_text, args.file_path))
     elif command == "session_fetch":
         sys.exit(handle_session_fetch(args.session_id))
+    elif command == "session_drafts":
+        sys.exit(handle_session_drafts(args.session_id))
+    elif command == "session_list":
+        sys.exit(handle_session_list(args.limit, args.cursor, args.participant_id))
+    elif command == "batch":
+        sys.exit(handle_batch(args.input, args.output, args.concurrency, args.http2))
+    elif command == "load_test":
+        sys.exit(handle_load_test(
+            args.url, args.mix, args.concurrency, args.duration, args.interval, args.sessions,
+            args.pdf_path, args.fake_llm_latency_ms, args.output, args.seed,
+        ))
+    elif command == "session_search":
+        sys.exit(handle_session_search(args.query, args.limit, args.offset))
     elif command == "aisession_create":
-        sys.exit(handle_aisession_create(args.esession_id)) 
+        sys.exit(handle_aisession_create(args.esession_id, not args.no_wait)) 
+    elif command == "aisession_status":
+        sys.exit(handle_aisession_status(args.aisession_id))
     elif command == "aisession_chat":
         sys.exit(handle_aisession_chat(args.aisession_id, args.message, args.context))
     else:
@@ -4,25 +4,51 @@ import httpx
 from typing import List, Dict, Any, Optional
 import json
 
-from .base import BaseEmailAssistantBackend
+from .base import BaseEmailAssistantBackend, wait_for_aisession
+
+
+def accepted_encodings() -> str:
+    """Accept-Encoding value listing the encodings httpx can decode here. br and zstd need optional packages."""
+    encodings = []
+    try:
+        import zstandard  # noqa: F401
+        encodings.append("zstd")
+    except ImportError:
+        pass
+    try:
+        import brotli  # noqa: F401
+        encodings.append("br")
+    except ImportError:
+        pass
+    return ", ".join(encodings + ["gzip"])
 
 
 class FastAPIBackend(BaseEmailAssistantBackend):
-    """FastAPI backend that connects to the LangGraph engine via HTTP."""
+    """FastAPI backend that connects to the LangGraph engine via HTTP.
+
+    All calls share one keep-alive client, which is safe to use from several
+    threads at once (see `batch.run_batch`).
+    """
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, http2: bool = False, max_connections: int = 10, compression: bool = True):
         self.base_url = base_url.rstrip('/')
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.client = httpx.Client(
+            timeout=30.0,
+            http2=http2,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            # httpx decodes the response body transparently
+            headers={"Accept-Encoding": accepted_encodings() if compression else "identity"},
+        )
     
-    async def _make_request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def _make_request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make HTTP request to FastAPI server."""
         url = f"{self.base_url}{endpoint}"
         
         try:
             if method.upper() == "GET":
-                response = await self.client.get(url)
+                response = self.client.get(url)
             elif method.upper() == "POST":
-                response = await self.client.post(url, json=data)
+                response = self.client.post(url, json=data)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
@@ -33,115 +59,157 @@ class FastAPIBackend(BaseEmailAssistantBackend):
                 error_detail = e.response.json().get("detail", str(e))
             except:
                 error_detail = str(e)
+            if e.response.status_code == 429 and "Retry-After" in e.response.headers:
+                error_detail += f" (retry after {e.response.headers['Retry-After']}s)"
             raise Exception(f"HTTP {e.response.status_code}: {error_detail}")
         except httpx.RequestError as e:
             raise Exception(f"Request failed: {e}")
     
     def person_create(self, name, email, phone_number):
         """Create a new person via FastAPI."""
-        import asyncio
         try:
-            result = asyncio.run(self._make_request("POST", "/person/create", {
+            result = self._make_request("POST", "/person/create", {
                 "name": name,
                 "email": email,
                 "phone_number": phone_number
-            }))
+            })
             return result["person_id"]
         except Exception as e:
             raise Exception(f"Failed to create person: {e}")
 
     def session_create(self, sender_id, receiver_id, subject) -> str:
         """Create a new session via FastAPI."""
-        import asyncio
         try:
-            result = asyncio.run(self._make_request("POST", "/esession/create", {
+            result = self._make_request("POST", "/esession/create", {
                 "sender_id": sender_id,
                 "receiver_id": receiver_id,
                 "subject": subject
-            }))
+            })
             return result["session_id"]
         except Exception as e:
             raise Exception(f"Failed to create session: {e}")
     
     def session_delete(self, session_id: str) -> bool:
         """Delete a session via FastAPI."""
-        import asyncio
         try:
-            result = asyncio.run(self._make_request("POST", "/esession/delete", {
+            result = self._make_request("POST", "/esession/delete", {
                 "session_id": session_id
-            }))
+            })
             return result["success"]
         except Exception as e:
             raise Exception(f"Failed to delete session: {e}")
     
     def session_edit(self, session_id: str, message_id: str, message_content: str) -> bool:
         """Edit a message in session via FastAPI."""
-        import asyncio
         try:
-            result = asyncio.run(self._make_request("POST", "/esession/edit", {
+            result = self._make_request("POST", "/esession/edit", {
                 "session_id": session_id,
                 "element_id": message_id,
                 "content": message_content
-            }))
+            })
             return result["success"]
         except Exception as e:
             raise Exception(f"Failed to edit message: {e}")
     
     def session_chat(self, session_id: str, sender_id: str, receiver_id: str, message_text: str, file_path: Optional[str]) -> str:
         """Add message to session and get response via FastAPI."""
-        import asyncio
         try:
-            result = asyncio.run(self._make_request("POST", "/esession/chat", {
+            result = self._make_request("POST", "/esession/chat", {
                 "session_id": session_id,
                 "sender_id": sender_id,
                 "receiver_id": receiver_id,
                 "message_text": message_text,
                 "file_path": file_path
-            }))
+            })
             return result["response"]
         except Exception as e:
             raise Exception(f"Failed to process message: {e}")
         
     def session_fetch(self, session_id: str) -> str:
         """Add message to session and get response via FastAPI."""
-        import asyncio
         try:
-            result = asyncio.run(self._make_request("POST", "/esession/fetch", {
+            result = self._make_request("POST", "/esession/fetch", {
                 "session_id": session_id
-            }))
+            })
             return result["response"]
         except Exception as e:
             raise Exception(f"Failed to process message: {e}")
         
-    def aisession_create(self, esession_id: str) -> str:
+    def session_drafts(self, session_id: str) -> List[Dict[str, Any]]:
+        """Fetch the draft replies of a session via FastAPI."""
+        try:
+            result = self._make_request("POST", "/esession/drafts", {
+                "session_id": session_id
+            })
+            return result["drafts"]
+        except Exception as e:
+            raise Exception(f"Failed to fetch drafts: {e}")
+        
+    def session_list(self, limit: int = 20, cursor: Optional[str] = None, participant_id: Optional[str] = None) -> Dict[str, Any]:
+        """List sessions by last activity via FastAPI."""
+        try:
+            result = self._make_request("POST", "/esession/list", {
+                "limit": limit,
+                "cursor": cursor,
+                "participant_id": participant_id
+            })
+            return {"sessions": result["sessions"], "next_cursor": result["next_cursor"]}
+        except Exception as e:
+            raise Exception(f"Failed to list sessions: {e}")
+        
+    def session_search(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Search sessions by message and attachment text via FastAPI."""
+        try:
+            result = self._make_request("POST", "/esession/search", {
+                "query": query,
+                "limit": limit,
+                "offset": offset
+            })
+            return {"sessions": result["sessions"], "messages": result["messages"]}
+        except Exception as e:
+            raise Exception(f"Failed to search sessions: {e}")
+        
+    def aisession_create(self, esession_id: str, wait: bool = True) -> str:
         """Create AI session via FastAPI.""" 
-        import asyncio 
         try:
-            result = asyncio.run(self._make_request("POST", "/aisession/create", {
+            result = self._make_request("POST", "/aisession/create", {
                 "esession_id": esession_id
-            }))
+            })
+            if wait:
+                return wait_for_aisession(self, result["aisession_id"])
             return result["aisession_id"]
         except Exception as e:
             raise Exception(f"Failed to process message: {e}")
     
+    def aisession_status(self, aisession_id: str) -> Dict[str, Any]:
+        """Get the setup status of an AI session via FastAPI."""
+        try:
+            return self._make_request("POST", "/aisession/status", {
+                "aisession_id": aisession_id
+            })
+        except Exception as e:
+            raise Exception(f"Failed to get AI session status: {e}")
+    
     def chat_with_sox(self, aisession_id: str, message: str, context) -> str:
         """Chat with Sox via FastAPI.""" 
-        import asyncio 
         try:
-            result = asyncio.run(self._make_request("POST", "/aisession/chat_with_sox", {
+            result = self._make_request("POST", "/aisession/chat_with_sox", {
                 "aisession_id": aisession_id,
                 "message": message,
                 "context": context
-            }))
+            })
             return result["response"]
         except Exception as e:
             raise Exception(f"Failed to process message: {e}")
 
+    def close(self):
+        """Close the HTTP client and its connections."""
+        self.client.close()
+
     def __del__(self):
         """Cleanup HTTP client."""
         if hasattr(self, 'client'):
             try:
-                import asyncio
-                asyncio.run(self.client.aclose())
+                self.client.close()
             except:
-                pass 
\ No newline at end of file
+                pass 
@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+
+# Operations a load test can mix, with the default weight of each
+DEFAULT_MIX = "person_create=1,session_chat=4,session_chat_pdf=1,session_fetch=6,aisession_create=1,sox_chat=2"
+LOAD_OPERATIONS = ("person_create", "session_chat", "session_chat_pdf", "session_fetch", "aisession_create", "sox_chat")
+PERCENTILES = (50, 90, 95, 99)
+AISESSION_READY_TIMEOUT = 60.0
+REQUEST_TIMEOUT = 120.0
+
+EMAIL_TEXTS = [
+    "Hi,\n\nThanks for the update. Could we move the review meeting to Thursday afternoon?\n\nBest,\n{name}",
+    "Hello,\n\nPlease find the revised statement of work attached. The pricing section changed.\n\nRegards,\n{name}",
+    "Hi,\n\nThe legal team still needs to sign off on the liability clause before we can countersign.\n\nThanks,\n{name}",
+    "Hello,\n\nWe agreed to ship the first milestone by the end of the quarter. Does that still work for you?\n\n{name}",
+]
+SOX_MESSAGES = [
+    "Summarize this email thread.",
+    "What is still open in this conversation?",
+    "Draft a reply that accepts the Thursday meeting.",
+    "What did they ask me to do?",
+]
+PDF_LINES = [
+    "Statement of Work - Contract Renewal",
+    "1. Scope. The Supplier provides the services in Schedule A under the agreed service levels.",
+    "2. Fees. Invoices are payable within thirty days of receipt.",
+    "3. Term. This agreement renews for twelve months unless terminated in writing.",
+]
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse "operation=weight,..." into weights, for example "session_fetch=6,sox_chat=1"."""
+    mix: Dict[str, float] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in LOAD_OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r}, expected one of {', '.join(LOAD_OPERATIONS)}")
+        mix[name] = float(weight) if weight.strip() else 1.0
+        if mix[name] < 0:
+            raise ValueError(f"Weight of {name} must not be negative")
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("The mix needs at least one operation with a positive weight")
+    return mix
+
+
+def write_sample_pdf(path: str, pages: int = 3):
+    """Write a small text PDF to attach to messages."""
+    def escape(text: str) -> str:
+        return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        lines = [f"Page {page + 1}"] + PDF_LINES * 4
+        text = " T* ".join(f"({escape(line)}) Tj" for line in lines)
+        stream = f"BT /F1 11 Tf 14 TL 72 740 Td {text} ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % len(objects)
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    body = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    body += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    """Mean, nearest-rank percentiles and maximum of latencies in milliseconds."""
+    if not latencies:
+        return {}
+    ordered = sorted(latencies)
+    stats = {"mean": round(sum(ordered) / len(ordered), 2)}
+    for p in PERCENTILES:
+        stats[f"p{p}"] = round(ordered[max(0, -(-p * len(ordered) // 100) - 1)], 2)
+    stats["max"] = round(ordered[-1], 2)
+    return stats
+
+
+def summarize(records: List[Tuple[float, str, float, Any]], elapsed: float) -> Dict[str, Any]:
+    """Requests, errors, throughput and latency of a list of (end offset, operation, latency, status) records."""
+    errors = sum(1 for record in records if not is_success(record[3]))
+    return {
+        "requests": len(records),
+        "errors": errors,
+        "error_rate": round(errors / len(records), 4) if records else 0.0,
+        "throughput_rps": round(len(records) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_ms": latency_stats([record[2] for record in records]),
+    }
+
+
+def is_success(status: Any) -> bool:
+    return isinstance(status, int) and status < 400
+
+
+class LoadTest:
+    """Closed-loop load generator: `concurrency` workers each send one request after another.
+
+    Every request picks an operation at random by the weights of `mix`. Before the
+    run, `sessions` email sessions with a few messages and one ready AI session per
+    worker are created for the operations to use.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, mix: Dict[str, float], concurrency: int, duration: float,
+                 interval: float, sessions: int, pdf_path: str, self_email: str, seed: Optional[int] = None):
+        self.client = client
+        self.mix = mix
+        self.concurrency = concurrency
+        self.duration = duration
+        self.interval = interval
+        self.sessions_count = sessions
+        self.pdf_path = pdf_path
+        self.self_email = self_email
+        self.rng = random.Random(seed)
+        self.run_id = uuid.uuid4().hex[:8]
+        self.self_id = ""
+        self.sessions: List[Tuple[str, str]] = []  # (session ID, contact ID)
+        self.aisessions: List[str] = []
+        self.records: List[Tuple[float, str, float, Any]] = []
+
+    async def post(self, path: str, payload: Dict[str, Any]) -> httpx.Response:
+        return await self.client.post(path, json=payload, timeout=REQUEST_TIMEOUT)
+
+    async def setup_post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = await self.post(path, payload)
+        if response.status_code >= 400:
+            raise RuntimeError(f"Setup request {path} failed with {response.status_code}: {response.text[:200]}")
+        return response.json()
+
+    async def setup(self):
+        """Create the people, email sessions and AI sessions the operations work on."""
+        response = await self.post("/person/seekbyemail", {"email": self.self_email})
+        if response.status_code == 200:
+            self.self_id = response.json()["person_id"]
+        else:
+            self.self_id = (await self.setup_post("/person/create", {
+                "name": "Load Test User", "email": self.self_email, "phone_number": "+1 555 0100",
+            }))["person_id"]
+
+        for i in range(self.sessions_count):
+            contact_id = (await self.setup_post("/person/create", self.new_person()))["person_id"]
+            session_id = (await self.setup_post("/esession/create", {
+                "sender_id": self.self_id, "receiver_id": contact_id, "subject": f"Load test thread {self.run_id}-{i}",
+            }))["session_id"]
+            self.sessions.append((session_id, contact_id))
+            for _ in range(3):
+                await self.setup_post("/esession/chat", self.new_message(session_id, contact_id))
+
+        pending = []
+        for i in range(self.concurrency):
+            session_id, _ = self.sessions[i % len(self.sessions)]
+            pending.append((await self.setup_post("/aisession/create", {"esession_id": session_id}))["aisession_id"])
+        deadline = time.monotonic() + AISESSION_READY_TIMEOUT
+        while pending:
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{len(pending)} AI sessions were not ready within {AISESSION_READY_TIMEOUT:.0f}s")
+            for aisession_id in list(pending):
+                status = (await self.setup_post("/aisession/status", {"aisession_id": aisession_id}))["status"]
+                if status == "failed":
+                    raise RuntimeError(f"AI session {aisession_id} could not be created")
+                if status == "ready":
+                    pending.remove(aisession_id)
+                    self.aisessions.append(aisession_id)
+            await asyncio.sleep(0.2)
+
+    def new_person(self) -> Dict[str, str]:
+        key = uuid.uuid4().hex[:12]
+        return {"name": f"Load Test Contact {key}", "email": f"load-{key}@loadtest.invalid", "phone_number": "+1 555 0199"}
+
+    def new_message(self, session_id: str, contact_id: str, file_path: Optional[str] = None) -> Dict[str, Any]:
+        sender_id, receiver_id = (self.self_id, contact_id) if self.rng.random() < 0.5 else (contact_id, self.self_id)
+        return {
+            "session_id": session_id,
+            "sender_id": sender_id,
+            "receiver_id": receiver_id,
+            "message_text": self.rng.choice(EMAIL_TEXTS).format(name="Load Test"),
+            "file_path": file_path,
+        }
+
+    async def run_operation(self, operation: str) -> httpx.Response:
+        if operation == "person_create":
+            return await self.post("/person/create", self.new_person())
+        if operation in ("session_chat", "session_chat_pdf"):
+            session_id, contact_id = self.rng.choice(self.sessions)
+            file_path = self.pdf_path if operation == "session_chat_pdf" else None
+            return await self.post("/esession/chat", self.new_message(session_id, contact_id, file_path))
+        if operation == "session_fetch":
+            return await self.post("/esession/fetch", {"session_id": self.rng.choice(self.sessions)[0], "include_content": True})
+        if operation == "aisession_create":
+            return await self.post("/aisession/create", {"esession_id": self.rng.choice(self.sessions)[0]})
+        return await self.post("/aisession/chat_with_sox", {
+            "aisession_id": self.rng.choice(self.aisessions), "message": self.rng.choice(SOX_MESSAGES), "context": None,
+        })
+
+    async def worker(self, started: float, deadline: float):
+        operations, weights = list(self.mix), list(self.mix.values())
+        while time.monotonic() < deadline:
+            operation = self.rng.choices(operations, weights)[0]
+            start = time.monotonic()
+            try:
+                status: Any = (await self.run_operation(operation)).status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            end = time.monotonic()
+            self.records.append((end - started, operation, (end - start) * 1000, status))
+
+    async def run(self) -> Dict[str, Any]:
+        """Set up, drive the load for `duration` seconds and return the report."""
+        await self.setup()
+        started = time.monotonic()
+        await asyncio.gather(*(self.worker(started, started + self.duration) for _ in range(self.concurrency)))
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        """Totals, per operation figures with status codes, and one entry per `interval` seconds."""
+        operations = {}
+        for operation in self.mix:
+            records = [r for r in self.records if r[1] == operation]
+            statuses: Dict[str, int] = {}
+            for record in records:
+                statuses[str(record[3])] = statuses.get(str(record[3]), 0) + 1
+            operations[operation] = {**summarize(records, elapsed), "status_codes": statuses}
+
+        timeline = []
+        buckets = max(1, -(-elapsed // self.interval))
+        for i in range(int(buckets)):
+            start = i * self.interval
+            records = [r for r in self.records if start <= r[0] < start + self.interval]
+            timeline.append({"start_s": round(start, 2), **summarize(records, min(self.interval, elapsed - start))})
+
+        return {
+            "config": {
+                "mix": self.mix,
+                "concurrency": self.concurrency,
+                "duration_s": self.duration,
+                "interval_s": self.interval,
+                "sessions": self.sessions_count,
+            },
+            "elapsed_s": round(elapsed, 2),
+            "totals": summarize(self.records, elapsed),
+            "operations": operations,
+            "timeline": timeline,
+        }
+
+
+@asynccontextmanager
+async def in_process_client(workdir: str, fake_llm_latency_ms: float):
+    """Client for the app served in this process over ASGI, with a throwaway database and the fake model."""
+    if "email_assistant.backend.database.config" in sys.modules:
+        raise RuntimeError("The in-process load test must configure the backend before it is imported")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'load_test.db')}"
+    os.environ["CHECKPOINT_DB_PATH"] = os.path.join(workdir, "checkpoints.sqlite")
+    os.environ["ATTACHMENT_INDEX_DIR"] = os.path.join(workdir, "attachment_index")
+    os.environ["SOX_MODEL_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(fake_llm_latency_ms)
+
+    from ..backend.database.init_db import init_db
+    from ..backend.main import app
+
+    init_db()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+            yield client
+
+
+@asynccontextmanager
+async def live_client(url: str, concurrency: int):
+    """Client for a running server, with one keep-alive connection per worker."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url.rstrip("/"), limits=limits) as client:
+        yield client
+
+
+async def _run_load_test(url: Optional[str], mix: Dict[str, float], concurrency: int, duration: float, interval: float,
+                         sessions: int, pdf_path: Optional[str], fake_llm_latency_ms: float, seed: Optional[int]) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="load_test_")
+    if not pdf_path:
+        pdf_path = os.path.join(workdir, "load_test.pdf")
+        write_sample_pdf(pdf_path)
+    # The server names the AI session's user by SELF_USER_EMAIL, so the load test acts as that person
+    self_email = os.getenv("SELF_USER_EMAIL") or "load-test-user@loadtest.invalid"
+    os.environ["SELF_USER_EMAIL"] = self_email
+
+    client_context = live_client(url, concurrency) if url else in_process_client(workdir, fake_llm_latency_ms)
+    async with client_context as client:
+        load_test = LoadTest(client, mix, concurrency, duration, interval, sessions, os.path.abspath(pdf_path), self_email, seed)
+        report = await load_test.run()
+    report["config"]["target"] = url or "in-process (fake LLM)"
+    return report
+
+
+def run_load_test(url: Optional[str] = None, mix: str = DEFAULT_MIX, concurrency: int = 8, duration: float = 30.0,
+                  interval: float = 5.0, sessions: int = 10, pdf_path: Optional[str] = None,
+                  fake_llm_latency_ms: float = 300.0, seed: Optional[int] = None) -> Dict[str, Any]:
+    """Drive the API with a weighted mix of operations and return the report.
+
+    Without `url` the app runs in this process over an ASGI transport, on a
+    throwaway database and with the fake model answering after
+    `fake_llm_latency_ms`. With `url`, `pdf_path` must exist on the server.
+    """
+    return asyncio.run(_run_load_test(
+        url, parse_mix(mix), concurrency, duration, interval, sessions, pdf_path, fake_llm_latency_ms, seed,
+    ))
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Text summary of a load test report."""
+    config, totals = report["config"], report["totals"]
+
+    def row(name: str, figures: Dict[str, Any]) -> str:
+        latency = figures["latency_ms"] or {}
+        cells = "".join(f"{latency.get(f'p{p}', 0):>9.1f}" for p in PERCENTILES)
+        return (f"{name:<18}{figures['requests']:>8}{figures['throughput_rps']:>9.1f}"
+                f"{figures['error_rate'] * 100:>8.1f}%{cells}{latency.get('max', 0):>9.1f}")
+
+    header = f"{'':<18}{'requests':>8}{'req/s':>9}{'errors':>9}" + "".join(f"{f'p{p} ms':>9}" for p in PERCENTILES) + f"{'max ms':>9}"
+    lines = [
+        f"Load test against {config['target']}: {config['concurrency']} workers for {report['elapsed_s']}s",
+        "",
+        header,
+    ]
+    for operation, figures in report["operations"].items():
+        lines.append(row(operation, figures))
+    lines.append(row("total", totals))
+
+    failing = {
+        operation: {status: count for status, count in figures["status_codes"].items() if not status.isdigit() or int(status) >= 400}
+        for operation, figures in report["operations"].items()
+    }
+    failing = {operation: statuses for operation, statuses in failing.items() if statuses}
+    if failing:
+        lines += ["", "Errors by status:"]
+        lines += [f"  {operation}: {', '.join(f'{status} x{count}' for status, count in statuses.items())}" for operation, statuses in failing.items()]
+
+    lines += ["", f"{'from s':>8}{'requests':>10}{'req/s':>9}{'errors':>9}{'p50 ms':>9}{'p95 ms':>9}"]
+    for bucket in report["timeline"]:
+        latency = bucket["latency_ms"] or {}
+        lines.append(
+            f"{bucket['start_s']:>8.1f}{bucket['requests']:>10}{bucket['throughput_rps']:>9.1f}"
+            f"{bucket['error_rate'] * 100:>8.1f}%{latency.get('p50', 0):>9.1f}{latency.get('p95', 0):>9.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy.pool import StaticPool
+
+from .base import BaseEmailAssistantBackend, wait_for_aisession
+from ..backend.database.config import SessionLocal, engine
+from ..backend.services.person_service import PersonService
+from ..backend.services.esession_service import SessionService as ESessionService
+from ..backend.services.aisession_service import SessionService as AISessionService
+
+_static_pool_lock = threading.Lock()
+
+
+class LocalBackend(BaseEmailAssistantBackend):
+    """In-process backend that calls the service layer directly, without HTTP.
+
+    Every call takes a database session from the shared engine pool and the
+    AI services reuse the one compiled Sox agent, so local scripting and bulk
+    operations run at function-call speed without a running server.
+    """
+
+    def __init__(self):
+        # One event loop per thread for the async service methods, so batch workers can share the backend
+        self._local = threading.local()
+        # Every loop created, so close() can close the loops of all threads
+        self._loops: List[asyncio.AbstractEventLoop] = []
+        self._loops_lock = threading.Lock()
+
+    def _run(self, coroutine):
+        loop = getattr(self._local, "loop", None)
+        if loop is None or loop.is_closed():
+            loop = self._local.loop = asyncio.new_event_loop()
+            with self._loops_lock:
+                self._loops.append(loop)
+        return loop.run_until_complete(coroutine)
+
+    @contextmanager
+    def _db(self):
+        """Open a database session for one call, like a request does on the server."""
+        # A StaticPool hands every thread the same connection, so calls must not overlap
+        lock = _static_pool_lock if isinstance(engine.pool, StaticPool) else nullcontext()
+        with lock:
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+    def person_create(self, name, email, phone_number):
+        """Create a new person in process."""
+        try:
+            with self._db() as db:
+                return self._run(PersonService(db).create_person(name, email, phone_number))
+        except Exception as e:
+            raise Exception(f"Failed to create person: {e}")
+
+    def session_create(self, sender_id, receiver_id, subject) -> str:
+        """Create a new session in process."""
+        try:
+            with self._db() as db:
+                return self._run(ESessionService(db).create_session(sender_id, receiver_id, subject))
+        except Exception as e:
+            raise Exception(f"Failed to create session: {e}")
+
+    def session_delete(self, session_id: str) -> bool:
+        """Delete a session in process."""
+        try:
+            with self._db() as db:
+                return self._run(ESessionService(db).delete_session(session_id))
+        except Exception as e:
+            raise Exception(f"Failed to delete session: {e}")
+
+    def session_edit(self, session_id: str, message_id: str, message_content: str) -> bool:
+        """Edit a message in session in process."""
+        try:
+            with self._db() as db:
+                return self._run(ESessionService(db).edit_message(session_id, message_id, message_content))
+        except Exception as e:
+            raise Exception(f"Failed to edit message: {e}")
+
+    def session_chat(self, session_id: str, sender_id: str, receiver_id: str, message_text: str, file_path: Optional[str]) -> str:
+        """Add message to session in process."""
+        try:
+            with self._db() as db:
+                return self._run(ESessionService(db).add_message(session_id, sender_id, receiver_id, message_text, file_path))
+        except Exception as e:
+            raise Exception(f"Failed to process message: {e}")
+
+    def session_fetch(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a session with its messages in process."""
+        try:
+            with self._db() as db:
+                return ESessionService(db).fetch_session(session_id)
+        except Exception as e:
+            raise Exception(f"Failed to fetch session: {e}")
+
+    def session_drafts(self, session_id: str) -> List[Dict[str, Any]]:
+        """Fetch the draft replies of a session in process."""
+        try:
+            with self._db() as db:
+                drafts = self._run(ESessionService(db).fetch_drafts(session_id))
+            if drafts is None:
+                raise ValueError(f"Session {session_id} not found")
+            return drafts
+        except Exception as e:
+            raise Exception(f"Failed to fetch drafts: {e}")
+
+    def session_list(self, limit: int = 20, cursor: Optional[str] = None, participant_id: Optional[str] = None) -> Dict[str, Any]:
+        """List sessions by last activity in process."""
+        try:
+            with self._db() as db:
+                return ESessionService(db).list_sessions(limit, cursor, participant_id)
+        except Exception as e:
+            raise Exception(f"Failed to list sessions: {e}")
+
+    def session_search(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """Search sessions by message and attachment text in process."""
+        try:
+            with self._db() as db:
+                return ESessionService(db).search(query, limit, offset)
+        except Exception as e:
+            raise Exception(f"Failed to search sessions: {e}")
+
+    def aisession_create(self, esession_id: str, wait: bool = True) -> str:
+        """Create AI session in process."""
+        try:
+            with self._db() as db:
+                aisession_id = self._run(AISessionService(db).create_session(esession_id))
+            if wait:
+                return wait_for_aisession(self, aisession_id)
+            return aisession_id
+        except Exception as e:
+            raise Exception(f"Failed to create AI session: {e}")
+
+    def aisession_status(self, aisession_id: str) -> Dict[str, Any]:
+        """Get the setup status of an AI session in process."""
+        try:
+            with self._db() as db:
+                status = AISessionService(db).get_status(aisession_id)
+            if status is None:
+                raise ValueError(f"AI session {aisession_id} not found")
+            return status
+        except Exception as e:
+            raise Exception(f"Failed to get AI session status: {e}")
+
+    def chat_with_sox(self, aisession_id: str, message: str, context) -> str:
+        """Chat with Sox in process."""
+        try:
+            with self._db() as db:
+                return str(AISessionService(db).chat_with_sox(aisession_id, message, context))
+        except Exception as e:
+            raise Exception(f"Failed to chat with Sox: {e}")
+
+    def close(self):
+        """Close the event loops of all threads that used the backend."""
+        with self._loops_lock:
+            loops, self._loops = self._loops, []
+        for loop in loops:
+            loop.close()
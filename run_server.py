@@ -3,14 +3,32 @@
 FastAPI server startup script for Email Assistant Agent.
 """
 
+import argparse
+import os
+
 import uvicorn
-from email_assistant.backend.main import app
 
-if __name__ == "__main__":
+
+def main():
+    parser = argparse.ArgumentParser(description="Start the Email Assistant Agent API server")
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Bind port")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="Number of worker processes (default: WEB_CONCURRENCY or 1)")
+    args = parser.parse_args()
+
+    # Auto-reload is a development convenience and only works with a single process.
+    # Each worker imports the app itself and sets up its own database pool,
+    # checkpoint connection and Bedrock clients in the app's lifespan hook.
     uvicorn.run(
         "email_assistant.backend.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=args.workers == 1,
         log_level="info"
-    )
\ No newline at end of file
+    )
+
+
+if __name__ == "__main__":
+    main()
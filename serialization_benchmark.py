@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for large `/esession/fetch` responses.
+
+Builds a throwaway database holding one session with many messages, then times
+the three stages of a fetch response against the previous implementation:
+turning rows into dicts, rendering the JSON body, and the whole request.
+
+    python serialization_benchmark.py --messages 2000 --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def median_ms(func, runs: int) -> float:
+    """Median wall time of `func()` in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def report(stage: str, before_ms: float, after_ms: float):
+    print(f"{stage:<10} before {before_ms:9.2f} ms   after {after_ms:9.2f} ms   speedup {before_ms / after_ms:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialization benchmark for large session fetches")
+    parser.add_argument("--messages", type=int, default=2000, help="Messages in the benchmark session")
+    parser.add_argument("--message_chars", type=int, default=1000, help="Length of each message")
+    parser.add_argument("--runs", type=int, default=20, help="Runs per measurement")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="serialization_benchmark_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ["ATTACHMENT_INDEX_DIR"] = os.path.join(workdir, "attachment_index")
+    os.environ["THREAD_SUMMARIES"] = "false"
+    sys.path.insert(0, ROOT)
+
+    from fastapi import FastAPI, Depends
+    from fastapi.responses import JSONResponse
+    from fastapi.testclient import TestClient
+    from sqlalchemy.inspection import inspect
+
+    from email_assistant.backend.main import app
+    from email_assistant.backend.api.responses import FastJSONResponse, orjson
+    from email_assistant.backend.database.config import SessionLocal, unit_of_work, to_json_value
+    from email_assistant.backend.database.init_db import init_db
+    from email_assistant.backend.database.models import SQLiteMessage as Message
+    from email_assistant.backend.database.repositories import PersonRepository, SessionRepository, MessageRepository
+    from email_assistant.backend.models.esession_models import ESessionFetchRequest, ESessionFetchResponse
+    from email_assistant.backend.services.esession_service import SessionService
+
+    init_db()
+    db = SessionLocal()
+    with unit_of_work(db):
+        sender = PersonRepository(db).create("Bench Sender", "sender@benchmark.test")
+        receiver = PersonRepository(db).create("Bench Receiver", "receiver@benchmark.test")
+        session = SessionRepository(db).create(str(sender.id), str(receiver.id), "Benchmark")
+        session_id = str(session.session_id)
+        text = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40)[:args.message_chars]
+        message_repo = MessageRepository(db)
+        for i in range(args.messages):
+            message_repo.create(session_id, str(sender.id), str(receiver.id), f"{i} {text}", None)
+    messages = MessageRepository(db).get_by_session(session_id)
+    print(f"orjson {'installed' if orjson else 'missing'}, {len(messages)} messages of {args.message_chars} characters")
+
+    # The previous BaseModel.to_dict, which inspected the mapper for every row
+    def legacy_to_dict(row):
+        result = {}
+        for c in inspect(row).mapper.column_attrs:
+            result[c.key] = to_json_value(getattr(row, c.key))
+        result["file_text"] = row.file_text
+        return result
+
+    report(
+        "rows",
+        median_ms(lambda: [legacy_to_dict(m) for m in messages], args.runs),
+        median_ms(lambda: [m.to_dict() for m in messages], args.runs),
+    )
+
+    payload = {"success": True, "response": {"messages": [m.to_dict() for m in messages]}, "message": "ok"}
+    report(
+        "render",
+        median_ms(lambda: JSONResponse(payload), args.runs),
+        median_ms(lambda: FastJSONResponse(payload), args.runs),
+    )
+    db.close()
+
+    # The previous route: rows serialized per column, validated against the response model, rendered with json
+    legacy_app = FastAPI()
+
+    @legacy_app.post("/esession/fetch", response_model=ESessionFetchResponse)
+    async def legacy_fetch(request: ESessionFetchRequest, session_service: SessionService = Depends()):
+        original = Message.to_dict
+        Message.to_dict = legacy_to_dict
+        try:
+            response = session_service.fetch_session(request.session_id, request.include_content)
+        finally:
+            Message.to_dict = original
+        return ESessionFetchResponse(success=True, response=response, message="Session detail fetched successfully!")
+
+    body = {"session_id": session_id, "include_content": True}
+    with TestClient(legacy_app) as legacy_client, TestClient(app) as client:
+        assert legacy_client.post("/esession/fetch", json=body).json() == client.post("/esession/fetch", json=body).json()
+        report(
+            "request",
+            median_ms(lambda: legacy_client.post("/esession/fetch", json=body), args.runs),
+            median_ms(lambda: client.post("/esession/fetch", json=body), args.runs),
+        )
+
+
+if __name__ == "__main__":
+    main()
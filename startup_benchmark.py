@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the Email Assistant CLI and API server.
+
+Each target is started in a fresh interpreter several times and the median wall
+time is compared with a budget. Heavy dependencies that must stay off the
+startup path are checked as well. Exits with status 1 on a regression.
+
+    python startup_benchmark.py             # benchmark
+    python startup_benchmark.py --profile   # also print the slowest imports
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1000"))
+
+TARGETS = {
+    "cli": [sys.executable, "-m", "email_assistant", "help"],
+    "server": [sys.executable, "-c", "import email_assistant.backend.main"],
+}
+
+# Loaded on first use only: the AI session endpoints, attachments and PDF parsing
+DEFERRED_MODULES = ["langchain", "langchain_aws", "langgraph", "boto3", "numpy", "pdfminer"]
+
+
+def time_target(command, runs: int) -> float:
+    """Return the median wall time in milliseconds of starting `command`."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def loaded_deferred_modules(module: str):
+    """Return the deferred modules that importing `module` pulls in."""
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return output.split()
+
+
+def import_profile(command, top: int):
+    """Return the `top` imports with the highest cumulative time, from `-X importtime`."""
+    result = subprocess.run(
+        [command[0], "-X", "importtime", *command[1:]],
+        capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the CLI and API server")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per target")
+    parser.add_argument("--budget_ms", type=float, default=STARTUP_BUDGET_MS, help="Median startup budget per target")
+    parser.add_argument("--profile", action="store_true", help="Print the slowest imports of each target")
+    parser.add_argument("--top", type=int, default=15, help="Number of imports to print with --profile")
+    args = parser.parse_args()
+
+    failed = False
+    for name, command in TARGETS.items():
+        median_ms = time_target(command, args.runs)
+        status = "OK" if median_ms <= args.budget_ms else "SLOW"
+        failed |= status != "OK"
+        print(f"{name:<8} {median_ms:8.1f} ms  (budget {args.budget_ms:.0f} ms)  {status}")
+        if args.profile:
+            for cumulative, module in import_profile(command, args.top):
+                print(f"    {cumulative / 1000:8.1f} ms  {module}")
+
+    leaked = loaded_deferred_modules("email_assistant.backend.main")
+    if leaked:
+        failed = True
+        print(f"Deferred modules imported at server startup: {', '.join(leaked)}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
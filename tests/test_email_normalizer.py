@@ -0,0 +1,41 @@
+import pytest
+
+from email_assistant.backend.engine.utils.email_normalizer import normalize_email_body
+
+
+@pytest.mark.parametrize("text", [
+    "Hi Bob,\nOn the budget: here is what finance writes:\nWe need 10k by Friday.\nThanks",
+    "Hi,\nOn Monday\nthe board wrote:\nApproved.\nCheers",
+    "Agenda:\nFrom: legal\nTo: all\nSubject: NDA\nPlease sign.",
+    "Totals:\n> 5 items shipped\nThe rest ships next week.",
+    "Agenda:\n--\nItem 1\nItem 2",
+])
+def test_keeps_message_text(text):
+    assert normalize_email_body(text) == text
+
+
+@pytest.mark.parametrize("text", [
+    "Thanks!\n\nOn Mon, Jan 1, 2024 at 10:00 AM John <john@example.com> wrote:\n> Can you review?\n> John",
+    "Thanks!\n\nOn Mon, Jan 1, 2024 at 10:00 AM John\n<john@example.com> wrote:\n\n> Can you review?",
+    "Thanks!\n\n-----Original Message-----\nFrom: John\nSubject: Review\n\nCan you review?",
+    "Thanks!\n\nFrom: John\nSent: Monday\nTo: Jane\nSubject: Re: Review\n\nCan you review?",
+    "Thanks!\n> Can you review?\n> John\n\nSent from my iPhone",
+    "Thanks!\n-- \nJane | Account Manager",
+])
+def test_strips_quoted_history_and_signatures(text):
+    assert normalize_email_body(text) == "Thanks!"
+
+
+def test_keeps_inline_reply_quotes():
+    text = "> Can you review?\nYes, by Friday.\n> And the budget?\nApproved."
+    assert normalize_email_body(text) == text
+
+
+def test_keeps_forwarded_text_without_its_header():
+    text = "FYI\n\n---------- Forwarded message ---------\nFrom: John\nDate: Mon\nSubject: Review\nTo: Jane\n\nCan you review?"
+    assert normalize_email_body(text) == "FYI\n\nCan you review?"
+
+
+def test_returns_original_when_nothing_is_left():
+    assert normalize_email_body("> only a quote") == "> only a quote"
+    assert normalize_email_body("") == ""
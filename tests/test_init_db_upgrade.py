@@ -0,0 +1,118 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Schema of the first release, before any migration in init_db existed
+BASELINE_DDL = """
+CREATE TABLE persons (
+    id VARCHAR(36) NOT NULL,
+    full_name VARCHAR(255) NOT NULL,
+    email_address VARCHAR(255) NOT NULL,
+    phone_number VARCHAR(50),
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME,
+    PRIMARY KEY (id),
+    UNIQUE (email_address)
+);
+CREATE TABLE esessions (
+    session_id VARCHAR(36) NOT NULL,
+    subject TEXT,
+    sender_id VARCHAR(36) NOT NULL,
+    receiver_id VARCHAR(36) NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME,
+    PRIMARY KEY (session_id),
+    FOREIGN KEY(sender_id) REFERENCES persons (id),
+    FOREIGN KEY(receiver_id) REFERENCES persons (id)
+);
+CREATE TABLE emessages (
+    message_id VARCHAR(36) NOT NULL,
+    session_id VARCHAR(36) NOT NULL,
+    sender_id VARCHAR(36) NOT NULL,
+    receiver_id VARCHAR(36) NOT NULL,
+    message_text TEXT NOT NULL,
+    message_file TEXT,
+    file_text TEXT,
+    is_draft BOOLEAN,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME,
+    PRIMARY KEY (message_id),
+    FOREIGN KEY(session_id) REFERENCES esessions (session_id),
+    FOREIGN KEY(sender_id) REFERENCES persons (id),
+    FOREIGN KEY(receiver_id) REFERENCES persons (id)
+);
+CREATE TABLE aisessions (
+    session_id VARCHAR(36) NOT NULL,
+    esession_id VARCHAR(36) NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME,
+    PRIMARY KEY (session_id),
+    FOREIGN KEY(esession_id) REFERENCES esessions (session_id)
+);
+"""
+
+REPLY = "Sounds good.\n\nOn Mon, Jan 1, 2024 at 10:00 AM Alice <alice@example.com> wrote:\n> Shall we meet?"
+
+UPGRADE_SCRIPT = """
+import json
+from email_assistant.backend.database.init_db import init_db
+from email_assistant.backend.database.config import SessionLocal
+from email_assistant.backend.database.repositories import MessageRepository
+
+init_db()
+init_db()
+db = SessionLocal()
+print(json.dumps({
+    "search": [hit["message_id"] for hit in MessageRepository(db).search("invoice")],
+    "prompt_text": MessageRepository(db).get_by_id("m2", with_content=True).prompt_text,
+}))
+"""
+
+
+def make_baseline_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_DDL)
+    conn.executemany("INSERT INTO persons (id, full_name, email_address) VALUES (?, ?, ?)", [
+        ("p1", "Alice", "alice@example.com"),
+        ("p2", "Bob", "bob@example.com"),
+    ])
+    conn.execute("INSERT INTO esessions (session_id, subject, sender_id, receiver_id) VALUES ('s1', 'Meeting', 'p1', 'p2')")
+    conn.executemany(
+        "INSERT INTO emessages (message_id, session_id, sender_id, receiver_id, message_text, message_file, file_text, is_draft)"
+        " VALUES (?, 's1', ?, ?, ?, ?, ?, 0)",
+        [
+            ("m1", "p1", "p2", "Shall we meet?", "invoice.pdf", "Invoice 42, payable within 30 days."),
+            ("m2", "p2", "p1", REPLY, None, None),
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_init_db_upgrades_a_baseline_database(tmp_path):
+    database_path = tmp_path / "baseline.db"
+    make_baseline_database(database_path)
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database_path}",
+        "ATTACHMENT_INDEX_DIR": str(tmp_path / "attachment_index"),
+        "THREAD_SUMMARIES": "false",
+    }
+    result = subprocess.run([sys.executable, "-c", UPGRADE_SCRIPT], cwd=ROOT, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+    output = json.loads(result.stdout.strip().splitlines()[-1])
+    assert output["search"] == ["m1"]
+    assert output["prompt_text"] == "Sounds good."
+
+    conn = sqlite3.connect(database_path)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(emessages)")}
+    assert "file_text" not in columns
+    assert conn.execute("SELECT message_id FROM emessages ORDER BY message_seq").fetchall() == [("m1",), ("m2",)]
+    assert conn.execute("SELECT COUNT(*) FROM emessages WHERE token_count IS NULL").fetchone() == (0,)
+    assert conn.execute("SELECT message_count FROM esessions").fetchone() == (2,)
+    assert os.listdir(tmp_path / "attachment_index")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the multi-worker server mode.
+
+Starts the server with each worker count in turn, drives it with concurrent
+clients for a fixed time and reports requests per second and the speedup over
+a single worker. Uses the database configured by DATABASE_URL; run
+`python init_database.py` first.
+
+    python worker_benchmark.py --workers 1,2,4 --clients 32 --duration 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# A database-backed read that exercises routing, validation and the repository layer
+ENDPOINT = "/esession/list"
+PAYLOAD = {"limit": 20}
+
+
+def wait_until_healthy(base_url: str, timeout: float = 60.0):
+    """Poll the health endpoint until the server answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become healthy within {timeout:.0f}s")
+
+
+def drive(base_url: str, clients: int, duration: float):
+    """Send requests from `clients` threads for `duration` seconds. Returns (completed, failed)."""
+    counts = {"ok": 0, "failed": 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client_loop():
+        ok = failed = 0
+        with httpx.Client(base_url=base_url, timeout=30) as client:
+            while time.monotonic() < deadline:
+                try:
+                    response = client.post(ENDPOINT, json=PAYLOAD)
+                    if response.status_code == 200:
+                        ok += 1
+                    else:
+                        failed += 1
+                except httpx.HTTPError:
+                    failed += 1
+        with lock:
+            counts["ok"] += ok
+            counts["failed"] += failed
+
+    threads = [threading.Thread(target=client_loop) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts["ok"], counts["failed"]
+
+
+def run(workers: int, port: int, clients: int, duration: float):
+    """Benchmark the server started with `workers` processes. Returns requests per second."""
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "run_server.py"), "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers)],
+        cwd=ROOT,
+        env={**os.environ, "WEB_CONCURRENCY": str(workers)},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_healthy(base_url)
+        drive(base_url, clients, min(duration, 2.0))  # Warm up every worker's pool
+        ok, failed = drive(base_url, clients, duration)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    rps = ok / duration
+    print(f"workers={workers:<3} {rps:10.1f} req/s  ({ok} ok, {failed} failed)")
+    return rps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the multi-worker server mode")
+    parser.add_argument("--workers", default="1,2,4", help="Comma separated worker counts")
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent client threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to measure per worker count")
+    parser.add_argument("--port", type=int, default=8765, help="Port to start the server on")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.clients} clients, POST {ENDPOINT} for {args.duration:.0f}s")
+    results = {}
+    for workers in [int(w) for w in args.workers.split(",")]:
+        results[workers] = run(workers, args.port, args.clients, args.duration)
+
+    baseline = results[min(results)]
+    if baseline:
+        for workers, rps in results.items():
+            print(f"workers={workers:<3} speedup {rps / baseline:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()